@@ -21,13 +21,21 @@ you with any personal data related to a BSN. Obviously you should only use this
 
 This library brings the following features to Robot Framework:
 - generating a valid BSN
+- generating large lists of BSNs in one go
+- generating BSNs in advance for stubs and load tests
 - generating a BSN that is unique within the current test run
 - generating a number that will not pass the eleven test
 - generating a BSN that starts with specific digits
 - generating a BSN that is less than 9 digits long
 - checking if a given number passes the eleven test
+- checking large lists or files of numbers against the eleven test
 - returning a list of BSNs generated during the current test run
-- specifying BSNs that should not be generated
+- reporting statistics of generated BSNs to spot ranges that are running out
+- listing all BSNs that start with specific digits
+- specifying BSNs that should not be generated, also from large text, CSV or gzip files
+- keeping generated BSNs unique per test or suite, or over multiple test runs and parallel processes
+- generating BSNs in Python with independent, thread-safe generators that can be seeded
+- replaying the BSNs of a test run with its seed, also for parallel processes
 
 Possible use cases:
 - A test message that is processed by one or more systems can be tracked by its unique BSN
@@ -84,13 +92,137 @@ to a suite, use `Clear Generated BSNs` in the teardown of the suite and of the p
 test to have its own set of excluded BSNs, use `Exclude BSNs` in de setup of each test and `Clear Excluded BSNs` in
 the teardown of each test.
 
+Instead of clearing the lists yourself, you can import the library with ``scope=suite`` or ``scope=test``, see
+`Importing`. The library then starts a new scope at the start of every suite, and with ``scope=test`` also of every
+test, and ends it at the end of that suite or test. BSNs generated or excluded within a scope are forgotten when it
+ends, while the BSNs of the enclosing scopes stay in effect. So BSNs excluded in the setup of the top-level suite are
+excluded in all tests, without excluding them again for every test, and every test can generate the same BSNs as
+other tests, but not the BSNs generated in the setup of its suites. Starting and ending a scope takes the same time
+however many BSNs are generated or excluded. `Clear Generated BSNs` and `Clear Excluded BSNs` still clear all BSNs,
+of all scopes, and BSNs in a persistent store, see `Extending the scope`, are never forgotten.
+
+| *** Settings *** |
+| Library | BSNLibrary | scope=test |
+| Suite Setup | Exclude BSNs From File | ${CURDIR}/production_bsns.txt.gz |
+
+In Python the same is done with ``enter_scope()`` and ``leave_scope()`` of a ``BSNGenerator``, see
+`Using BSNLibrary in Python`.
+
 == Extending the scope ==
-It is possible to extend the scope of uniqueness of BSNs over test runs with `Get Generated BSNs` and `Get Excluded
-BSNs` at the end of the test run and appending this list to a file. Then at the start of a test run read the list
-from the file and offer it as input to `Exclude BSNs`. However, you cannot do this infinitely, because after a
-certain amount of repetitions the list of excluded BSNs will be so large that it will lead to performance or other
-problems. The BSNLibary_test suite, see `Installation`, contains example 'Extending the scope of uniqueness beyond
-one test run' under '3 Demos'.
+To extend the scope of uniqueness of BSNs over test runs, use `Open Persistent BSN Store` at the start of the test
+run. From then on every BSN generated with ``unique=True`` is also marked in a store on disk and `Generate BSN` will
+not generate BSNs that were marked in previous test runs. The store holds one bit for every possible number, so
+checking and marking a BSN takes the same time however many BSNs are stored, and nothing is loaded into memory at
+the start of a test run. Be aware that the store needs 125 MB of disk space for BSNs of 9 digits, and 12.5 MB, 1.25
+MB and 125 kB for lengths 8, 7 and 6. To start over, close the store and remove the directory.
+
+`Clear Generated BSNs` does not clear the persistent store. BSNs excluded with `Exclude BSNs` are not marked in the
+store. The BSNs marked in previous test runs are only known once they are generated again, so they are not counted
+by `Get Remaining BSN Capacity` until then. The BSNLibary_test suite, see `Installation`, contains example 'Extending
+the scope of uniqueness beyond one test run' under '3 Demos'.
+
+== Parallel test execution ==
+The list of generated BSNs only exists in the process that runs the tests. When test suites run in parallel
+processes, for example with [https://pabot.org|Pabot], each process has its own list and different processes can
+generate the same BSN. To keep BSNs unique over all processes, let every process open the same directory with
+`Open Persistent BSN Store` and ``shared=True``, for example in the setup of every suite. Each process then
+reserves a generated BSN in the shared store before returning it. Processes only wait for each other when they
+reserve BSNs that are stored in the same byte of the store, so generating BSNs does not slow down when more
+processes are added. No server process is needed, but all processes must run on the same machine.
+
+If you need uniqueness within one test run only, give every test run its own directory, for example with a
+directory name that is passed with ``--variable`` to all processes, and remove it after the test run.
+
+= Performance =
+`Generate BSN` checks its arguments and draws a random BSN every time it is used. This takes little time, but in
+tight loops, for example in a stub or a load test that generates a BSN for every message, it adds up. For large
+numbers of BSNs at once, use `Generate BSNs`.
+
+Generated and excluded BSNs are stored as numbers of 4 bytes instead of strings, which takes about 10 bytes per BSN.
+So even lists of millions of generated or excluded BSNs take little memory. They are converted back to strings when
+they are returned by `Get Generated BSNs` or `Get Excluded BSNs`.
+
+== Pool of reserved BSNs ==
+When BSNs are needed one at a time, use `Open BSN Pool`. From then on a background thread generates unique BSNs in
+advance for every combination of ``given`` and ``length`` that `Generate BSN` is used with, and reserves them as
+generated BSNs and in the persistent store, if one is open. `Generate BSN` with ``unique=True`` then only takes the
+next BSN from the pool, without checking its arguments again if they are the same as in an earlier call. When the
+background thread does not keep up, `Generate BSN` refills the pool itself with a batch of BSNs, which is still faster
+than generating them one by one. Reserved BSNs that are not taken yet are not returned by `Get Generated BSNs`.
+Reserved BSNs that are excluded with `Exclude BSNs` are taken out of the pool.
+
+Use `Close BSN Pool` when the BSNs are no longer needed, for example in the teardown of a suite. It releases the
+reserved BSNs that were not taken, so they can be generated again later. `Clear Generated BSNs` and `Open
+Persistent BSN Store` release the reserved BSNs as well, after which the pool is refilled.
+
+== Generator statistics ==
+BSNLibrary counts how often `Generate BSN` and `Generate BSNs` are used, how many BSNs they generate and how long
+that takes, both in total and for every combination of ``given`` and ``length``. It also counts collisions, i.e.
+randomly drawn BSNs that had to be replaced because they were generated, excluded or stored persistently before,
+and how many retries each use of `Generate BSN` needed. Use `Get BSN Generator Statistics` to get these counters
+or `Log BSN Generator Statistics` in a suite teardown to log them. A growing number of retries for a value of
+``given`` shows that the BSNs permitted by it are running out, long before `Generate BSN` fails.
+
+BSNs that `Generate BSN` takes from a pool, see `Pool of reserved BSNs`, are not counted as calls. They are counted
+under key ``pool``, together with the refills of the pool and their retries, collisions and remainder 10 fix-ups.
+
+= Reproducing generated BSNs =
+`Generate BSN` and `Generate BSNs` draw their numbers from a random generator of the library, that has its own seed.
+Without a seed on import a random seed is drawn, that `Get BSN Generator Seed` and `Log BSN Generator Statistics`
+log. To replay the BSNs of a run, for example to find out which BSN triggered a bug further down the chain, import
+the library with that seed, see `Importing`. With the same seed and the same keyword calls the same BSNs are
+generated. A BSN pool, see `Pool of reserved BSNs`, fills its buffers in another thread, so a run that uses a pool
+can not be replayed exactly.
+
+For example, import the library with a variable that is ``None`` by default:
+
+| *** Variables *** |
+| ${BSN_SEED} | ${None} |
+|
+| *** Settings *** |
+| Library | BSNLibrary | seed=${BSN_SEED} |
+
+and replay a run with ``robot --variable BSN_SEED:8351207493264871630 tests``.
+
+When test suites run in parallel processes, also give every process a different ``worker``, for example
+``${PABOTQUEUEINDEX}`` with Pabot. Each process then gets its own random generator derived from the seed and the
+worker, so the processes do not generate the same sequence of BSNs, while each of them can still be replayed.
+
+= Using BSNLibrary in Python =
+The keywords of this library use one shared generator of the class ``BSNLibrary.BSNGenerator``, that can also be
+used directly in Python, for example in pytest fixtures or in load generators like Locust. Every instance of
+``BSNGenerator`` has its own generated and excluded BSNs, persistent store, pool, statistics and random generator,
+so instances do not affect each other or the keywords. All methods of an instance can be used from multiple threads
+at the same time. The random generator can be seeded to generate the same BSNs every time, and instances for
+parallel workers can derive independent random generators from one seed with ``BSNGenerator(seed, worker)``.
+
+| from BSNLibrary import BSNGenerator
+|
+| generator = BSNGenerator(seed=42)
+| bsn = generator.generate_bsn(given="12")
+| bsns = generator.generate_bsns(1000, length=8)
+| bsns = await generator.generate_bsns_async(1000)  # In a coroutine, runs in a thread of the event loop.
+
+The methods take the same arguments as the keywords with the same name. The shared generator of the keywords is
+``BSNLibrary.bsn_generator``.
+
+Importing BSNLibrary only imports modules of the Python standard library and not Robot Framework, so it takes little
+time, for example in worker processes that are started often. ``BSNGenerator`` also works where Robot Framework is
+not installed, for example after ``pip install --no-deps robotframework-bsnlibrary``.
+
+= Generating BSNs from the command line =
+To create files with BSNs for other purposes than tests, BSNLibrary installs the command line tool ``bsngenerator``.
+It generates ``COUNT`` BSNs with the same arguments as `Generate BSNs` and writes them to standard output or a file,
+as one BSN on each line or as CSV file with header ``bsn``. BSNs in files given with ``--exclude`` are not generated,
+see `Exclude BSNs From File`.
+
+| bsngenerator 1000000 --given 12 --length 9 --exclude used.csv.gz --format csv --output bsns.csv
+| bsngenerator 50000000 --processes 0 --seed 42 --output bsns.txt
+
+The BSNs are generated in blocks of BSNs that start with the same digits, that can be divided over multiple
+processes with ``--processes``, ``0`` uses all CPUs. Unique BSNs are unique within the output, even with millions of
+BSNs, while only a few blocks are kept in memory. With ``--seed`` the output is the same every time, whatever the
+number of processes. Use ``bsngenerator --help`` for all options.
 
 = Troubleshooting =
 Most exceptions are self-explanatory. The BSNLibary_test suite, see `Installation`, demonstrates how  BSNLibrary
@@ -98,13 +230,13 @@ exceptions can be reproduced.
 
 The following exception (with example counts and arguments) needs more explanation:
 
-| 'Generate BSN' was not able to generate a unique BSN after 1000 retries. You have generated 900 out of the 900 or
-| 901 unique BSNs that are permitted by 9 excluded BSNs and arguments given=12345 and length=9.
+| 'Generate BSN' was not able to generate a unique BSN. You have generated all 900 unique BSNs that are permitted by
+| 9 excluded BSNs and arguments given=12345 and length=9.
 
-This means that all or more than 99% of all possible BSNs within the given restrictions have been generated. For
-further insight you could use `Get Generated BSNs` and `Get Excluded BSNs` to log those lists just before this
-exception occurs. The exception only counts generated and excluded BSNs that could have been generated with the
-current arguments.
+This means that all possible BSNs within the given restrictions have been generated. For further insight you could
+use `Get Generated BSNs` and `Get Excluded BSNs` to log those lists just before this exception occurs. The exception
+only counts generated and excluded BSNs that could have been generated with the current arguments. To find out
+beforehand how many BSNs are left, use `Get Remaining BSN Capacity`.
 
 Possible solutions are:
 - Use ``unique=False`` if you do not need unique BSNs
@@ -112,39 +244,35 @@ Possible solutions are:
 - Limit the length of ``given`` and/or avoid using the same value for ``given`` repeatedly
 - Reduce the list of excluded BSNs
 
-`Generate BSN` generates numbers randomly and is not suitable for generating all possible numbers in a range of 10000
-or more number. If you want to find all BSNs in a range, divide the range in smaller ranges of 100 numbers and loop
-through those ranges. The BSNLibary_test suite, see `Installation`, contains example 'Finding all BSNs in a range'
-under '3 Demos'.
+`Generate BSN` picks a random number from the BSNs that are still permitted, so it keeps its speed when almost all
+BSNs in a range have been generated and it is able to generate the very last one. Still, if you want to find all
+BSNs in a range, use `Find All BSNs In Range` instead. It lists them in order without any randomness. The
+BSNLibary_test suite, see `Installation`, contains example 'Finding all BSNs in a range' under '3 Demos'.
 
 There is a similar second exception (again with example counts and arguments)
 
-| 'Generate BSN' was not able to generate a BSN outside the list of excluded BSNs after 1000 retries. You have
-| excluded 909 out of the 909 or 910 BSNs that are permitted by arguments given=12345 and length=9.
+| 'Generate BSN' was not able to generate a BSN outside the list of excluded BSNs. You have excluded all 909 BSNs
+| that are permitted by arguments given=12345 and length=9.
 
 In this case only the last two possible solutions apply. Unless your were intentionally trying to do the impossible,
 I would like you [https://github.com/HaaiHenkie/bsnlibrary/issues/new|to log] how you ended up with this last
 exception, so that I have anecdotal evidence that I did not include this exception for nothing.
 
-If you experience slow performance this is probably caused by a large number of both generated BSNs and excluded BSNs
-that have used a large percentage of all BSNs that are permitted by current arguments. The possible solutions are the
-same as for the exceptions above.
-
 When you are not able to resolve a problem regarding BSNLibrary,
 [https://github.com/HaaiHenkie/bsnlibrary/issues/new|register an issue].
 """
 
-import random
-import textwrap
-from BSNLibrary import exceptions
-from robot.api import deco
+import itertools
+from BSNLibrary import _deco as deco
+from BSNLibrary.generator import BSNGenerator, VALID_LENGTH, _eleven_test_batch, _import_numpy
+from BSNLibrary.store import _passes_eleven_test
 import logging
 
 __version__ = '1.1.0'
-ROBOT_LIBRARY_SCOPE = 'GLOBAL'
-VALID_LENGTH = {6, 7, 8, 9}
-used_bsns = []
-excluded_bsns = []
+bsn_generator = BSNGenerator()
+used_bsns = bsn_generator.used_bsns
+excluded_bsns = bsn_generator.excluded_bsns
+generator_statistics = bsn_generator.statistics
 
 
 @deco.keyword('Generate BSN')
@@ -185,135 +313,94 @@ def generate_bsn(given="", length=9, unique=True):
     | FAIL : The given number '999450437' is not a valid BSN.
     | ${bsn4} = 30340731
     """
-    given = str(given)
-    given_length = len(given)
-    try:
-        length = int(length)
-    except (TypeError, ValueError) as e:
-        e.args = ("Value for length must be 6, 7, 8 or 9.",)
-        raise
-    if length not in VALID_LENGTH:
-        raise ValueError("Value for length must be 6, 7, 8 or 9.")
-    max_length = length - 2
-    if given_length > max_length:
-        raise exceptions.GivenNumberWrongLength(textwrap.dedent("""\
-            The length of the given number, %d digits, exceeds the maximum value. This maximum value equals 
-            'length' argument - 2, in this case %d - 2 = %d.""" % (given_length, length, max_length)))
-    if str(unique).lower() in ('false', 'none', 'no', 'off', '0') or given_length == length:
-        unique = False
-    else:
-        unique = bool(unique)
-    power = length - given_length
-    all_numbers = 10 ** power
-    min_numbers = int(all_numbers / 11)
-    if given[:3] == "999":
-        min_numbers = all_numbers - min_numbers - 1
-    excluded_matches = sum(e[:given_length] == given and len(e) == length for e in excluded_bsns)
-    if unique:
-        generated_bsn = _check_uniqueness(given, length, given_length, excluded_matches, min_numbers)
-    else:
-        generated_bsn = _check_exclusion(given, length, given_length, excluded_matches, min_numbers)
-    return generated_bsn
-
-
-def _check_uniqueness(given, length, given_length, excluded_matches, min_numbers):
-    global used_bsns
-    generated_bsn = ""
-    min_possible = min_numbers - excluded_matches
-    max_possible = min_possible + 1
-    iteration = 0
-    while generated_bsn == "" or generated_bsn in used_bsns:
-        iteration += 1
-        if iteration == 1001:
-            used_matches = sum(e[:given_length] == given and len(e) == length for e in used_bsns)
-            raise exceptions.FailedToGenerateAllowedBSN(textwrap.dedent("""\
-                'Generate BSN' was not able to generate a unique BSN after 1000 retries. You have generated %d 
-                out of the %d or %d unique BSNs that are permitted by %d excluded BSNs and arguments given=%s 
-                and length=%d. See section Troubleshooting on web page https://haaihenkie.github.io/bsnlibrary/ 
-                for possible solutions.""" % (used_matches, min_possible, max_possible, excluded_matches, given,
-                                              length)))
-        generated_bsn = _check_exclusion(given, length, given_length, excluded_matches, min_numbers)
-    used_bsns.append(generated_bsn)
-    return generated_bsn
-
-
-def _check_exclusion(given, length, given_length, excluded_matches, min_numbers):
-    generated_bsn = ""
-    max_numbers = min_numbers + 1
-    iteration = 0
-    while generated_bsn == "" or generated_bsn in excluded_bsns:
-        iteration += 1
-        if iteration == 1001:
-            raise exceptions.FailedToGenerateAllowedBSN(textwrap.dedent("""\
-                'Generate BSN' was not able to generate a BSN outside the list of excluded BSNs after 1000 
-                retries. You have excluded %d out of the %d or %d BSNs that are permitted by arguments given=%s 
-                and length=%d. See section Troubleshooting on web page https://haaihenkie.github.io/bsnlibrary/ 
-                for possible solutions.""" % (excluded_matches, min_numbers, max_numbers, given, length)))
-        generated_bsn = _generate_validate(given, length, given_length)
-    return generated_bsn
-
-
-def _generate_validate(given, length, given_length):
-    sum_product = 0
-    pos = length
-    digit1 = None
-    digit2 = None
-    generated_bsn = ""
-    if given_length > 0:
-        for d in given:
-            try:
-                d = int(d)
-                if pos > 1:
-                    sum_product = sum_product + d * pos
-                    generated_bsn += str(d)
-                else:
-                    digit1 = d
-                pos = pos - 1
-            except (TypeError, ValueError) as e:
-                e.args = ("Character '%s' is not a digit. Only use digits as part of a BSN." % d,)
-                raise
-    else:
-        digit = random.randint(1, 7)
-        sum_product = sum_product + digit * pos
-        generated_bsn = str(digit)
-        pos = pos - 1
-    while pos > 1:
-        if pos == length - 2 and generated_bsn[:2] == "99":
-            digit = random.randint(0, 8)
-        else:
-            digit = random.randint(0, 9)
-        sum_product = sum_product + digit * pos
-        generated_bsn += str(digit)
-        if pos == 2:
-            digit2 = digit
-        pos = pos - 1
-    mod = sum_product % 11
-    if given[:3] == "999" and given_length < length:
-        digit1 = _exclude_digit(mod)
-    else:
-        if given_length == length:
-            if digit1 != mod:
-                raise exceptions.NumberNotValid("The given number '%s' is not a valid BSN." % given)
-        elif mod == 10:
-            # logging.info("REMAINDER 10 GENERATION PATH: generated string '%s'." % generated_bsn)
-            sum_product = sum_product - digit2 * 2
-            generated_bsn = generated_bsn[:-1]
-            digit2 = _exclude_digit(digit2)
-            generated_bsn += str(digit2)
-            sum_product = sum_product + digit2 * 2
-            mod = sum_product % 11
-            digit1 = mod
-        else:
-            digit1 = mod
-    generated_bsn += str(digit1)
-    return generated_bsn
+    return bsn_generator.generate_bsn(given, length, unique)
+
+
+@deco.keyword('Generate BSNs')
+def generate_bsns(count, given="", length=9, unique=True):
+    """
+    Generates a list of ``count`` BSNs in one go. The arguments ``given``, ``length`` and ``unique`` work exactly the
+    same as for `Generate BSN`, so the list is the same as the result of using `Generate BSN` ``count`` times. Use
+    this keyword when you need a large number of BSNs, for example to create test data.
+
+    If [https://numpy.org|NumPy] is installed, the BSNs are generated in batches with array operations, which is
+    much faster for large numbers. NumPy is optional and can be installed with BSNLibrary:
+
+    ``pip install robotframework-bsnlibrary[numpy]``
+
+    With ``unique=True`` the keyword fails beforehand if fewer than ``count`` permitted BSNs have not been generated
+    or excluded yet. In that case no BSNs are generated.
 
+    Examples:
+    | ${bsns1} = | Generate BSNs | 3 | | # Generates 3 unique valid BSNs. |
+    | ${bsns2} = | Generate BSNs | 2 | 9994 | length=8 | # Generates 2 unique invalid BSNs with 8 positions. |
+    =>
+    | ${bsns1} = ['267104923', '613840286', '150731425']
+    | ${bsns2} = ['99948573', '99940115']
+    """
+    return bsn_generator.generate_bsns(count, given, length, unique)
 
-def _exclude_digit(digit):
-    new = digit
-    while new == digit:
-        new = random.randint(0, 9)
-    return new
+
+@deco.keyword('Get Remaining BSN Capacity')
+def get_remaining_bsn_capacity(given="", length=9, unique=True):
+    """
+    Returns the exact number of BSNs that `Generate BSN` can still generate with the same arguments, i.e. the BSNs
+    permitted by ``given`` and ``length`` that have not been generated or excluded yet. The arguments work the same as
+    for `Generate BSN`. With ``unique=False`` only excluded BSNs are subtracted.
+
+    The number is calculated from the eleven test and from the indexes of generated and excluded BSNs, so it takes
+    little time, also for long lists of generated or excluded BSNs. Use it to choose another value for ``given`` or to
+    clear the generated BSNs before a range runs out. BSNs that are reserved by a pool, see `Pool of reserved BSNs`,
+    count as generated.
+
+    With a persistent store open, see `Extending the scope`, BSNs that were generated in previous test runs are not
+    subtracted until `Generate BSN` or `Generate BSNs` comes across them. The number can then be higher than the
+    number of BSNs that can really be generated.
+
+    Examples:
+    | ${capacity1} = | Get Remaining BSN Capacity | 1234567 | | # BSNs of 9 digits that start with '1234567'. |
+    | ${bsn} = | Generate BSN | 1234567 |
+    | ${capacity2} = | Get Remaining BSN Capacity | 1234567 |
+    | ${capacity3} = | Get Remaining BSN Capacity | 9994 | length=8 | # Invalid BSNs of 8 digits. |
+    =>
+    | ${capacity1} = 9
+    | ${bsn} = 123456745
+    | ${capacity2} = 8
+    | ${capacity3} = 9091
+    """
+    return bsn_generator.count_remaining(given, length, unique)
+
+
+@deco.keyword('Find All BSNs In Range')
+def find_all_bsns_in_range(given="", length=9, skip_generated=False, skip_excluded=False):
+    """
+    Returns a list of all BSNs that `Generate BSN` could generate with the same ``given`` and ``length`` arguments,
+    in ascending order. The range is determined by ``given`` in the same way as for `Generate BSN`, so with a
+    ``given`` value that starts with '999' it lists all invalid numbers in the range.
+
+    If ``skip_generated`` is given a true value, BSNs on the list of generated BSNs are left out. If
+    ``skip_excluded`` is given a true value, BSNs that are excluded with `Exclude BSNs` are left out.
+
+    The list is built without any randomness by stepping from one number to the next and calculating the last digit
+    with the eleven test. Be aware that a short ``given`` value results in a very long list. In Python the BSNs can
+    be iterated one at a time with ``BSNLibrary.iter_bsns``, which takes the same arguments.
+
+    Examples:
+    | ${bsns1} = | Find All BSNs In Range | 1234567 |
+    | ${bsns2} = | Find All BSNs In Range | 1234567 | skip_excluded=True |
+    =>
+    | ${bsns1} = ['123456708', '123456721', '123456733', '123456745', '123456757', '123456769', '123456770',
+    | '123456782', '123456794']
+    """
+    return list(iter_bsns(given, length, skip_generated, skip_excluded))
+
+
+@deco.not_keyword
+def iter_bsns(given="", length=9, skip_generated=False, skip_excluded=False):
+    """Yields the BSNs that `Find All BSNs In Range` returns, one at a time."""
+    skip_generated = str(skip_generated).lower() not in ('false', 'none', 'no', 'off', '0') and bool(skip_generated)
+    skip_excluded = str(skip_excluded).lower() not in ('false', 'none', 'no', 'off', '0') and bool(skip_excluded)
+    return bsn_generator.iter_bsns(given, length, skip_generated, skip_excluded)
 
 
 @deco.keyword('Validate BSN')
@@ -334,10 +421,133 @@ def validate_bsn(bsn):
     length = len(bsn)
     if length not in VALID_LENGTH:
         raise ValueError("Length of BSN can only be 6, 7, 8 or 9 digits.")
-    _generate_validate(bsn, length, length)
+    bsn_generator._generate_validate(bsn, length, length)
     logging.info("The BSN '%s' is valid." % bsn)
 
 
+@deco.keyword('Validate BSNs')
+def validate_bsns(bsns, mask=False):
+    """
+    Validates a large number of BSNs in one go and returns a dictionary with the results, instead of failing on the
+    first number that does not pass the eleven test. Numbers that do not consist of 6, 7, 8 or 9 digits are counted as
+    invalid as well.
+
+    ``bsns`` argument is a list of BSNs or a single BSN. To validate the BSNs in a file, use `Validate BSNs From
+    File`.
+
+    The returned dictionary contains the keys ``count``, ``valid`` and ``invalid`` with the number of validated,
+    valid and invalid BSNs. By default key ``invalid_indices`` contains the indices of the invalid BSNs, i.e. their
+    position in the list. If ``mask`` is given a true value, key ``mask`` contains instead a list with ``True`` for
+    every valid and ``False`` for every invalid BSN.
+
+    If [https://numpy.org|NumPy] is installed, the BSNs are validated with array operations, see `Generate BSNs`.
+
+    Examples:
+    | ${bsnlist} = | Create List | 627708195 | 566709883 | 12345 |
+    | ${result} = | Validate BSNs | ${bsnlist} |
+    | ${result} = | Validate BSNs | ${bsnlist} | mask=True |
+    =>
+    | ${result} = {'count': 3, 'valid': 1, 'invalid': 2, 'invalid_indices': [1, 2]}
+    | ${result} = {'count': 3, 'valid': 1, 'invalid': 2, 'mask': [True, False, False]}
+    """
+    mask = str(mask).lower() not in ('false', 'none', 'no', 'off', '0') and bool(mask)
+    if isinstance(bsns, str):
+        bsns = [bsns]
+    return _validate_iterable(bsns, mask)
+
+
+@deco.keyword('Validate BSNs From File')
+def validate_bsns_from_file(path, mask=False, encoding='UTF-8'):
+    """
+    Validates the BSNs in a file in the same way as `Validate BSNs` and returns the same dictionary. The file is read
+    in chunks, so even a file with millions of BSNs is not loaded into memory at once.
+
+    ``path`` is the path of a text file with one BSN on each line. The indices of the invalid BSNs are their line
+    numbers minus 1. The keyword fails if the file does not exist.
+
+    ``mask`` works the same as for `Validate BSNs`.
+
+    ``encoding`` is the encoding of the file.
+
+    Example:
+    | ${result} = | Validate BSNs From File | ${CURDIR}/extract.txt |
+    =>
+    | ${result} = {'count': 3, 'valid': 1, 'invalid': 2, 'invalid_indices': [1, 2]}
+    """
+    mask = str(mask).lower() not in ('false', 'none', 'no', 'off', '0') and bool(mask)
+    with open(path, encoding=encoding) as bsnfile:
+        return _validate_iterable((line.strip() for line in bsnfile), mask)
+
+
+def _validate_iterable(bsns, mask):
+    numpy = _import_numpy()
+    bsns = iter(bsns)
+    results = []
+    count = 0
+    valid = 0
+    while True:
+        chunk = [str(bsn) for bsn in itertools.islice(bsns, 100000)]
+        if not chunk:
+            break
+        if numpy is not None:
+            chunk_mask = _eleven_test_batch(numpy, chunk)
+            valid += int(chunk_mask.sum())
+            if mask:
+                results.extend(chunk_mask.tolist())
+            else:
+                results.extend((numpy.flatnonzero(~chunk_mask) + count).tolist())
+        else:
+            chunk_mask = [_passes_eleven_test_str(bsn) for bsn in chunk]
+            valid += sum(chunk_mask)
+            if mask:
+                results.extend(chunk_mask)
+            else:
+                results.extend(count + i for i, passed in enumerate(chunk_mask) if not passed)
+        count += len(chunk)
+    result = {'count': count, 'valid': valid, 'invalid': count - valid}
+    result['mask' if mask else 'invalid_indices'] = results
+    return result
+
+
+def _passes_eleven_test_str(bsn):
+    return len(bsn) in VALID_LENGTH and bsn.isascii() and bsn.isdigit() and _passes_eleven_test(int(bsn))
+
+
+@deco.keyword('Scan File For BSNs')
+def scan_file_for_bsns(path, check_known=False, max_reported=1000):
+    """
+    Searches a file of any size for BSNs, e.g. a dump of XML, JSON or fixed-width messages, and validates them with
+    the eleven test of `Validate BSN`. Every run of 6 to 9 digits that is not part of a longer run of digits counts as
+    a BSN. The file is memory-mapped and searched in chunks, so even a file of several gigabytes is not loaded into
+    memory. The digits have to be ASCII, as in UTF-8 or Latin-1 encoded files.
+
+    ``path`` is the path of the file.
+
+    If ``check_known`` is given a true value, the BSNs are also looked up in the generated BSNs, the excluded BSNs and
+    the persistent BSN store, if one is open. BSNs that are in none of them are reported as unknown, e.g. to check
+    that messages only contain BSNs generated by the test run.
+
+    ``max_reported`` is the maximum number of invalid and of unknown BSNs that is included in the result. The counts
+    always include all BSNs.
+
+    Returns a dictionary with the keys ``count``, ``valid`` and ``invalid`` with the number of found, valid and
+    invalid BSNs. Key ``invalid_bsns`` contains a list of the byte offset in the file and the number of each invalid
+    BSN. With ``check_known`` keys ``unknown`` and ``unknown_bsns`` contain the same for unknown BSNs.
+
+    Examples:
+    | ${result} = | Scan File For BSNs | ${CURDIR}/messages.xml |
+    | Should Be Equal As Integers | ${result}[invalid] | 0 |
+    | ${result} = | Scan File For BSNs | ${CURDIR}/messages.xml | check_known=True |
+    =>
+    | ${result} = {'count': 3, 'valid': 2, 'invalid': 1, 'invalid_bsns': [(170, '123456789')]}
+    | ${result} = {'count': 3, 'valid': 2, 'invalid': 1, 'invalid_bsns': [(170, '123456789')], 'unknown': 1,
+    | 'unknown_bsns': [(170, '123456789')]}
+    """
+    result = bsn_generator.scan_file(path, check_known, max_reported)
+    logging.info("%d BSNs found, %d valid, %d invalid." % (result['count'], result['valid'], result['invalid']))
+    return result
+
+
 @deco.keyword('Get Generated BSNs')
 def get_generated_bsns():
     """
@@ -354,7 +564,7 @@ def get_generated_bsns():
     | INFO : List of 0 generated BSNs has been cleared.
     | INFO : ${generated_bsns} = ['143828654', '123095141', '189392307']
     """
-    return used_bsns
+    return bsn_generator.get_generated_bsns()
 
 
 @deco.keyword('Clear Generated BSNs')
@@ -375,9 +585,7 @@ def clear_generated_bsns():
     | INFO : List of 3 generated BSNs has been cleared.
     | INFO : ${generated_bsns} = []
     """
-    global used_bsns
-    count = len(used_bsns)
-    del used_bsns[:]
+    count = bsn_generator.clear_generated_bsns()
     logging.info("List of %d generated BSNs has been cleared." % count)
 
 
@@ -385,11 +593,16 @@ def clear_generated_bsns():
 def exclude_bsns(bsnlist):
     """
     Excludes BSNs from being generated from the moment it is used until the end of the test run or until `Clear
-    Excluded BSNs` is used. It will combine ``bsnlist`` with previously excluded BSNs. If you need ``bsnlist`` to
-    replace previously excluded BSNs, use `Clear Excluded BSNs` first.
+    Excluded BSNs` is used. It will add the BSNs in ``bsnlist`` that are not excluded yet to previously excluded BSNs.
+    If you need ``bsnlist`` to replace previously excluded BSNs, use `Clear Excluded BSNs` first.
 
     ``bsnlist`` is a single BSN or a list of BSNs to be excluded
 
+    Only the BSNs in ``bsnlist`` are checked and added, so using this keyword many times with a few BSNs takes no
+    longer than using it once with all of them. Returns a dictionary with the number of BSNs that were ``added`` and
+    the number of ``duplicates``, i.e. BSNs that were excluded already. To exclude BSNs from a file, use `Exclude BSNs
+    From File`.
+
     Example:
     | ${bsnlist} =       | Create List       | 267227607 | 307684945 | 643897100 |
     | Exclude BSNs       | ${bsnlist}        |
@@ -397,13 +610,49 @@ def exclude_bsns(bsnlist):
     | ${excluded_bsns} = | Get Excluded BSNs |
     =>
     | INFO : ${bsnlist} = ['267227607', '307684945', '643897100']
-    | INFO : ${excluded_bsns} = ['501840151', '307684945', '267227607', '643897100']
+    | INFO : 3 BSNs have been excluded, 0 BSNs were excluded already.
+    | INFO : 1 BSNs have been excluded, 0 BSNs were excluded already.
+    | INFO : ${excluded_bsns} = ['267227607', '307684945', '643897100', '501840151']
     """
-    global excluded_bsns
     if type(bsnlist) is not list:
         bsn = bsnlist
         bsnlist = [bsn]
-    excluded_bsns = bsnlist + list(set(excluded_bsns) - set(bsnlist))
+    added = bsn_generator.exclude_bsns(bsnlist)
+    logging.info("%d BSNs have been excluded, %d BSNs were excluded already." % (added, len(bsnlist) - added))
+    return {'added': added, 'duplicates': len(bsnlist) - added}
+
+
+@deco.keyword('Exclude BSNs From File')
+def exclude_bsns_from_file(path, column=None, delimiter=None, encoding='UTF-8'):
+    """
+    Excludes the BSNs in a file in the same way as `Exclude BSNs`. The file is read in chunks, so even a file with
+    millions of BSNs is not loaded into memory at once.
+
+    ``path`` is the path of a text file with one BSN on each line or of a CSV file. Files with extension ``.gz`` or
+    that start with the gzip signature are decompressed while they are read.
+
+    ``column`` is the index, starting with 0, or the name of the column with BSNs in a CSV file. If ``column`` is
+    given or the file has extension ``.csv`` (or ``.csv.gz``), the file is read as CSV. The first column is used by
+    default. If the first value in the column is not a number, the first line is treated as a header and skipped.
+
+    ``delimiter`` is the character that separates the columns in a CSV file. By default it is detected from the
+    first line, with a comma as fallback.
+
+    ``encoding`` is the encoding of the file.
+
+    Returns a dictionary with the number of BSNs that were ``added`` and the number of ``duplicates``.
+
+    Examples:
+    | ${result} = | Exclude BSNs From File | ${CURDIR}/used_last_week.txt.gz |
+    | ${result} = | Exclude BSNs From File | ${CURDIR}/persons.csv | column=bsn | delimiter=; |
+    =>
+    | INFO : 1500000 BSNs have been excluded, 12 BSNs were excluded already.
+    | INFO : 250 BSNs have been excluded, 3 BSNs were excluded already.
+    """
+    result = bsn_generator.exclude_bsns_from_file(path, column, delimiter, encoding)
+    logging.info("%d BSNs have been excluded, %d BSNs were excluded already."
+                 % (result['added'], result['duplicates']))
+    return result
 
 
 @deco.keyword('Clear Excluded BSNs')
@@ -423,8 +672,7 @@ def clear_excluded_bsns():
     | INFO : The list of excluded BSNs has been cleared.
     | INFO : ${excluded_bsns} = []
     """
-    global excluded_bsns
-    del excluded_bsns[:]
+    bsn_generator.clear_excluded_bsns()
     logging.info("The list of excluded BSNs has been cleared.")
 
 
@@ -441,4 +689,234 @@ def get_excluded_bsns():
     | INFO : ${bsnlist} = ['423932020', '107004422', '233354773']
     | INFO : ${excluded_bsns} = ['423932020', '107004422', '233354773']
     """
-    return excluded_bsns
+    return bsn_generator.get_excluded_bsns()
+
+
+@deco.keyword('Open Persistent BSN Store')
+def open_persistent_bsn_store(directory, shared=False):
+    """
+    Opens a store on disk that keeps generated BSNs unique over multiple test runs, see `Extending the scope`. If
+    another persistent store is open, it is closed first.
+
+    ``directory`` is the path of the directory that holds the files of the store. It is created if it does not exist.
+
+    If ``shared`` is given a true value, multiple processes can use the store at the same time, for example when
+    running tests in parallel with [https://pabot.org|Pabot], see `Parallel test execution`.
+
+    Example:
+    | Open Persistent BSN Store | ${CURDIR}/bsnstore |
+    | ${bsn} = | Generate BSN | # This BSN will not be generated again in later test runs. |
+    | Close Persistent BSN Store |
+    =>
+    | INFO : Persistent BSN store in directory '/tests/bsnstore' has been opened.
+    | ${bsn} = 564820387
+    | INFO : Persistent BSN store in directory '/tests/bsnstore' has been closed.
+    """
+    if str(shared).lower() in ('false', 'none', 'no', 'off', '0'):
+        shared = False
+    else:
+        shared = bool(shared)
+    close_persistent_bsn_store()
+    bsn_generator.open_persistent_store(directory, shared)
+    logging.info("Persistent BSN store in directory '%s' has been opened." % directory)
+
+
+@deco.keyword('Close Persistent BSN Store')
+def close_persistent_bsn_store():
+    """
+    Closes the store opened with `Open Persistent BSN Store`. All BSNs generated so far remain in the store. Does
+    nothing if no persistent store is open.
+    """
+    directory = bsn_generator.close_persistent_store()
+    if directory is not None:
+        logging.info("Persistent BSN store in directory '%s' has been closed." % directory)
+
+
+@deco.keyword('Open BSN Pool')
+def open_bsn_pool(size=1000):
+    """
+    Opens a pool that generates unique BSNs in advance, so that `Generate BSN` with ``unique=True`` only has to take
+    the next BSN from the pool, see `Pool of reserved BSNs`. If another pool is open, it is closed first.
+
+    ``size`` is the number of BSNs that the pool keeps ready for every combination of ``given`` and ``length`` that
+    has been used with `Generate BSN`.
+
+    Example:
+    | Open BSN Pool | size=500 |
+    | FOR | ${i} | IN RANGE | 10000 |
+    | | ${bsn} = | Generate BSN | 12 |
+    | END |
+    | Close BSN Pool |
+    =>
+    | INFO : BSN pool with size 500 has been opened.
+    | INFO : BSN pool has been closed and 500 reserved BSNs have been released.
+    """
+    close_bsn_pool()
+    bsn_generator.open_pool(size)
+    logging.info("BSN pool with size %d has been opened." % int(size))
+
+
+@deco.keyword('Close BSN Pool')
+def close_bsn_pool():
+    """
+    Closes the pool opened with `Open BSN Pool`. The BSNs that were reserved by the pool, but not generated yet, are
+    released, so they are not in the list returned by `Get Generated BSNs` nor in the persistent store. Does nothing if
+    no pool is open.
+    """
+    count = bsn_generator.close_pool()
+    if count is not None:
+        logging.info("BSN pool has been closed and %d reserved BSNs have been released." % count)
+
+
+@deco.keyword('Get BSN Generator Statistics')
+def get_bsn_generator_statistics(reset=False):
+    """
+    Returns statistics of `Generate BSN` and `Generate BSNs` since the start of the test run or since the last reset,
+    see `Generator statistics`.
+
+    If ``reset`` is given a true value, the statistics are reset after they are returned.
+
+    Example:
+    | Generate BSN | 12 | 6 |
+    | ${statistics} = | Get BSN Generator Statistics |
+    | Should Be Equal As Integers | ${statistics}[calls] | 1 |
+    =>
+    | ${statistics} = {'calls': 1, 'bsns': 1, 'failures': 0, 'seconds': 2.1e-05, 'retries': 0, 'retry_histogram':
+    | {0: 1}, 'collisions': {'generated': 0, 'excluded': 0, 'persisted': 0}, 'remainder_10_fixups': 0, 'prefixes':
+    | [{'given': '12', 'length': 6, 'calls': 1, 'bsns': 1, 'retries': 0, 'failures': 0, 'seconds': 2.1e-05}], 'pool':
+    | {'taken': 0, 'refills': 0, 'bsns': 0, 'seconds': 0.0, 'retries': 0, 'collisions': {'generated': 0, 'excluded': 0,
+    | 'persisted': 0}, 'remainder_10_fixups': 0}}
+    """
+    reset = str(reset).lower() not in ('false', 'none', 'no', 'off', '0') and bool(reset)
+    return bsn_generator.get_statistics(reset)
+
+
+@deco.keyword('Log BSN Generator Statistics')
+def log_bsn_generator_statistics(reset=False, prefixes=10):
+    """
+    Logs a summary of the statistics returned by `Get BSN Generator Statistics`, for example in a suite teardown.
+
+    ``prefixes`` is the maximum number of combinations of ``given`` and ``length`` that are logged, starting with the
+    ones with the most retries.
+
+    Example:
+    | *** Settings *** |
+    | Suite Teardown | Log BSN Generator Statistics |
+    =>
+    | INFO : BSN generator statistics: 1200 calls generated 1200 BSNs in 0.032 seconds with 0 failures.
+    | Seed: 8351207493264871630.
+    | Retries per call: 0 retries: 1181 calls, 1 retries: 19 calls.
+    | Collisions: generated 19, excluded 0, persisted 0. Remainder 10 fix-ups: 107.
+    | given=12 length=6: 200 calls, 200 BSNs, 19 retries, 0 failures, 0.009 seconds.
+    | given= length=9: 1000 calls, 1000 BSNs, 0 retries, 0 failures, 0.023 seconds.
+    """
+    statistics = get_bsn_generator_statistics(reset)
+    lines = ["BSN generator statistics: %d calls generated %d BSNs in %.3f seconds with %d failures."
+             % (statistics['calls'], statistics['bsns'], statistics['seconds'], statistics['failures']),
+             _describe_seed() + ".",
+             "Retries per call: %s." % (", ".join("%d retries: %d calls" % item
+                                                  for item in statistics['retry_histogram'].items()) or "none"),
+             "Collisions: %s. Remainder 10 fix-ups: %d."
+             % (", ".join("%s %d" % item for item in statistics['collisions'].items()),
+                statistics['remainder_10_fixups'])]
+    pool = statistics['pool']
+    if pool['taken'] or pool['refills']:
+        lines.append("Pool: %(taken)d BSNs taken, %(refills)d refills generated %(bsns)d BSNs in %(seconds).3f seconds "
+                     "with %(retries)d retries." % pool)
+    for prefix in statistics['prefixes'][:int(prefixes)]:
+        lines.append("given=%(given)s length=%(length)d: %(calls)d calls, %(bsns)d BSNs, %(retries)d retries, "
+                     "%(failures)d failures, %(seconds).3f seconds." % prefix)
+    logging.info("\n".join(lines))
+
+
+@deco.keyword('Get BSN Generator Seed')
+def get_bsn_generator_seed():
+    """
+    Returns the seed of the random generator of the library and logs it, with the worker if one was given when the
+    library was imported, see `Reproducing generated BSNs`.
+
+    Example:
+    | ${seed} = | Get BSN Generator Seed |
+    =>
+    | INFO : Seed: 8351207493264871630, worker: 2
+    | ${seed} = 8351207493264871630
+    """
+    logging.info(_describe_seed())
+    return bsn_generator.seed
+
+
+def _describe_seed():
+    if bsn_generator.worker is None:
+        return "Seed: %d" % bsn_generator.seed
+    return "Seed: %d, worker: %s" % (bsn_generator.seed, bsn_generator.worker)
+
+
+# Robot Framework uses this class as the library, so that it can be imported with arguments and act as a listener.
+# Its keywords are the keyword functions of this module, which all use the shared bsn_generator.
+class BSNLibrary(object):
+    ROBOT_LIBRARY_SCOPE = 'GLOBAL'
+    ROBOT_LIBRARY_VERSION = __version__
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, scope='run', seed=None, worker=None):
+        """
+        ``scope`` is the smallest scope of uniqueness and exclusion, see `Reducing the scope`:
+        - ``run`` (default): BSNs are unique and excluded until the end of the test run
+        - ``suite``: BSNs generated or excluded in a suite are forgotten at the end of the suite
+        - ``test``: as ``suite`` and also BSNs generated or excluded in a test are forgotten at the end of the test
+
+        ``seed`` is a whole number to seed the random generator with, to generate the same BSNs as a previous run.
+        By default a random seed is used. ``worker`` gives parallel processes that use the same ``seed``
+        independent random generators, e.g. ``${PABOTQUEUEINDEX}`` with Pabot. See `Reproducing generated BSNs`.
+
+        Examples:
+        | =Setting= | =Value= | =Value= | =Value= |
+        | Library | BSNLibrary | | |
+        | Library | BSNLibrary | scope=test | |
+        | Library | BSNLibrary | seed=${BSN_SEED} | worker=${PABOTQUEUEINDEX} |
+        """
+        scope = str(scope).lower()
+        if scope not in ('run', 'suite', 'test'):
+            raise ValueError("Value for scope must be run, suite or test.")
+        if seed is not None or worker is not None:
+            bsn_generator.reseed(seed, worker)
+        self.scope = scope
+        self._entered = []
+        if scope != 'run':
+            self.ROBOT_LIBRARY_LISTENER = self
+
+    def get_keyword_names(self):
+        return [name for name, value in globals().items() if hasattr(value, 'robot_name')]
+
+    def __getattr__(self, name):
+        value = globals().get(name)
+        if not hasattr(value, 'robot_name'):
+            raise AttributeError(name)
+        return value
+
+    def start_suite(self, data, result):
+        self._enter(data.id)
+
+    def end_suite(self, data, result):
+        self._leave(data.id)
+
+    def start_test(self, data, result):
+        if self.scope == 'test':
+            self._enter(data.id)
+
+    def end_test(self, data, result):
+        if self.scope == 'test':
+            self._leave(data.id)
+
+    def _enter(self, item_id):
+        bsn_generator.enter_scope()
+        self._entered.append(item_id)
+
+    def _leave(self, item_id):
+        # Suites that started before the library was imported end without having been entered.
+        if self._entered and self._entered[-1] == item_id:
+            self._entered.pop()
+            bsn_generator.leave_scope()
+
+
+BSNLibrary.__doc__ = __doc__
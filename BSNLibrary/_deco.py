@@ -0,0 +1,21 @@
+"""
+Keyword decorators that set the same attributes as ``robot.api.deco``, so importing BSNLibrary does not import Robot
+Framework. Robot Framework reads these attributes when it loads the library.
+"""
+
+
+def keyword(name=None, tags=(), types=()):
+    if callable(name):
+        return keyword()(name)
+
+    def decorator(func):
+        func.robot_name = name
+        func.robot_tags = tags
+        func.robot_types = types
+        return func
+    return decorator
+
+
+def not_keyword(func):
+    func.robot_not_keyword = True
+    return func
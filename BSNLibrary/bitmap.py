@@ -0,0 +1,129 @@
+"""
+Persistent store for the BSNs that are generated by BSNLibrary over multiple test runs.
+"""
+
+import mmap
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class BSNBitmap(object):
+    """
+    Set of BSNs on disk with one bit for every possible number per length, e.g. 10^9 bits or 125 MB for length 9.
+
+    Every length has its own file in ``directory``, which is created when it is first needed and opened with mmap.
+    Checking and adding a BSN only touches the byte that holds its bit, so nothing is loaded into memory at start.
+
+    With ``shared`` set to ``True`` multiple processes can add BSNs to the same bitmap at the same time. Adding a BSN
+    then locks only the byte that holds its bit in the file, so processes only wait for each other when they add
+    BSNs that share a byte.
+    """
+
+    def __init__(self, directory, shared=False):
+        self.directory = directory
+        self.shared = shared
+        self._maps = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __contains__(self, bsn):
+        location = self._locate(bsn)
+        if location is None:
+            return False
+        bitmap, bitmap_file, position, bit = location
+        return bool(bitmap[position] & bit)
+
+    def add(self, bsn):
+        """Adds ``bsn`` to the bitmap. Returns ``False`` if it was already added."""
+        bitmap, bitmap_file, position, bit = self._locate(bsn, create=True)
+        with self._lock:
+            if self.shared:
+                _lock_byte(bitmap_file, position)
+            try:
+                value = bitmap[position]
+                if value & bit:
+                    return False
+                bitmap[position] = value | bit
+                return True
+            finally:
+                if self.shared:
+                    _unlock_byte(bitmap_file, position)
+
+    def discard(self, bsn):
+        location = self._locate(bsn)
+        if location is None:
+            return
+        bitmap, bitmap_file, position, bit = location
+        with self._lock:
+            if self.shared:
+                _lock_byte(bitmap_file, position)
+            try:
+                bitmap[position] &= ~bit
+            finally:
+                if self.shared:
+                    _unlock_byte(bitmap_file, position)
+
+    def _contains_numbers(self, numpy, numbers, length):
+        """
+        Returns a NumPy array that tells for every number of ``length`` digits in the NumPy array ``numbers`` if it is
+        in the bitmap. The bits are looked up with array operations on the mapped file.
+        """
+        mapped = self._map(length, False)
+        if mapped is None:
+            return numpy.zeros(len(numbers), dtype=bool)
+        with self._lock:
+            bits = numpy.frombuffer(mapped[0], dtype=numpy.uint8)[numbers >> 3]
+        return (bits >> (numbers & 7) & 1).astype(bool)
+
+    def close(self):
+        with self._lock:
+            for bitmap, bitmap_file in self._maps.values():
+                bitmap.flush()
+                bitmap.close()
+                bitmap_file.close()
+            self._maps.clear()
+
+    def _locate(self, bsn, create=False):
+        bsn = str(bsn)
+        if not (bsn.isascii() and bsn.isdigit()):
+            raise ValueError("Only BSNs that consist of digits can be stored in a bitmap, not '%s'." % bsn)
+        mapped = self._map(len(bsn), create)
+        if mapped is None:
+            return None
+        number = int(bsn)
+        return mapped[0], mapped[1], number >> 3, 1 << (number & 7)
+
+    def _map(self, length, create):
+        with self._lock:
+            if length not in self._maps:
+                path = os.path.join(self.directory, "bsns%d.bitmap" % length)
+                if not create and not os.path.exists(path):
+                    return None
+                bitmap_file = open(path, "a+b")
+                size = (10 ** length + 7) // 8
+                if os.path.getsize(path) < size:
+                    bitmap_file.truncate(size)
+                self._maps[length] = (mmap.mmap(bitmap_file.fileno(), size), bitmap_file)
+            return self._maps[length]
+
+
+def _lock_byte(bitmap_file, position):
+    if fcntl is not None:
+        fcntl.lockf(bitmap_file.fileno(), fcntl.LOCK_EX, 1, position)
+    else:
+        os.lseek(bitmap_file.fileno(), position, os.SEEK_SET)
+        msvcrt.locking(bitmap_file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_byte(bitmap_file, position):
+    if fcntl is not None:
+        fcntl.lockf(bitmap_file.fileno(), fcntl.LOCK_UN, 1, position)
+    else:
+        os.lseek(bitmap_file.fileno(), position, os.SEEK_SET)
+        msvcrt.locking(bitmap_file.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,188 @@
+"""
+Command line tool that generates BSNs in bulk and writes them to standard output or a file.
+
+Usage:
+    bsngenerator COUNT [--given GIVEN] [--length LENGTH] [--not-unique] [--exclude FILE] [--format {lines,csv}]
+                       [--output FILE] [--processes N] [--seed SEED]
+
+The range of BSNs permitted by ``given`` and ``length`` is split into blocks of BSNs that start with the same digits.
+Every block gets a share of ``COUNT`` proportional to the number of BSNs it permits, rounded up or down at random, and
+is generated independently, with a seed drawn from the main random generator. Unique BSNs are therefore unique over
+the whole output without sharing state between blocks, the blocks can be generated by a pool of processes and only a
+few blocks are kept in memory at the same time. The blocks are written in random order. With the same seed the output
+is the same, whatever the number of processes.
+"""
+
+import argparse
+import collections
+import multiprocessing
+import os
+import sys
+import textwrap
+from BSNLibrary import exceptions
+from BSNLibrary.generator import (BSNGenerator, _check_arguments, _count_permitted, _expand_prefix, _permitted_digits,
+                                  _weighted_sum)
+from BSNLibrary.store import _POWERS, _import_numpy, _passes_eleven_test
+
+# Number of digits that are generated in a block, including the check digit, i.e. about 91000 valid BSNs per block.
+_BLOCK_DIGITS = 6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bsngenerator', description="Generates BSNs (Dutch citizen service number).")
+    parser.add_argument('count', type=int, help="number of BSNs to generate")
+    parser.add_argument('--given', default="",
+                        help="digits the BSNs start with, BSNs that start with 999 fail the eleven test")
+    parser.add_argument('--length', type=int, default=9, help="number of digits, 6, 7, 8 or 9 (default)")
+    parser.add_argument('--not-unique', dest='unique', action='store_false',
+                        help="generate every BSN independently, so the output may contain duplicates")
+    parser.add_argument('--exclude', action='append', default=[], metavar='FILE',
+                        help="file with BSNs that are not generated, see keyword 'Exclude BSNs From File', "
+                             "can be used multiple times")
+    parser.add_argument('--exclude-column', help="index or name of the column with BSNs in a CSV exclude file")
+    parser.add_argument('--format', choices=('lines', 'csv'), default='lines',
+                        help="one BSN per line (default) or CSV with header 'bsn'")
+    parser.add_argument('--output', help="file to write the BSNs to, default is standard output")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="number of processes that generate blocks of BSNs, 0 uses all CPUs")
+    parser.add_argument('--seed', type=int, help="seed for the random generator")
+    args = parser.parse_args(argv)
+    if args.count < 0:
+        parser.error("Value for count must be a positive number.")
+    if args.processes < 0:
+        parser.error("Value for processes must be a positive number or 0.")
+    generator = BSNGenerator(args.seed)
+    try:
+        given, length, unique = _check_arguments(args.given, args.length, args.unique)
+        for path in args.exclude:
+            generator.exclude_bsns_from_file(path, args.exclude_column)
+        tasks = _plan_blocks(generator, args.count, given, length, unique)
+        output = open(args.output, 'w', buffering=1 << 20, newline='') if args.output else sys.stdout
+    except (exceptions.Error, ValueError, OSError) as e:
+        parser.exit(1, "%s: error: %s\n" % (parser.prog, e))
+    try:
+        if args.format == 'csv':
+            output.write("bsn\n")
+        for block in _generate_blocks(tasks, args.processes or None):
+            output.write(block)
+        if not args.output:
+            output.flush()
+    except BrokenPipeError:
+        # The reader, e.g. head, stopped reading. Python flushes standard output again when it exits, so it is pointed
+        # to os.devnull first to exit without another BrokenPipeError.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+def _plan_blocks(generator, count, given, length, unique):
+    """
+    Returns the tasks for ``_generate_block``: the BSNs that start with ``given`` are split into blocks and ``count``
+    is divided over the blocks in proportion to the number of BSNs each block permits.
+    """
+    invalid = given[:3] == "999"
+    # Invalid numbers are about ten times as many, so their blocks start one digit further.
+    depth = max(len(given), length - _BLOCK_DIGITS + invalid)
+    prefixes = [given]
+    while len(prefixes[0]) < depth:
+        prefixes = [prefix + str(digit) for prefix in prefixes for digit in _permitted_digits(prefix, invalid)]
+    excluded = {prefix: [] for prefix in prefixes}
+    for bsn in generator.excluded_bsns:
+        if len(bsn) == length and bsn[:depth] in excluded and bsn.isdigit() and \
+                _passes_eleven_test(int(bsn)) != invalid:
+            excluded[bsn[:depth]].append(bsn)
+    capacities = [_count_permitted(prefix, length, invalid) - len(excluded[prefix]) for prefix in prefixes]
+    total = sum(capacities)
+    if (count > total if unique else count and not total):
+        excluded_matches = sum(map(len, excluded.values()))
+        raise exceptions.FailedToGenerateAllowedBSN(textwrap.dedent("""\
+            Not able to generate %d %sBSNs. Only %d BSNs are permitted by %d excluded BSNs and arguments given=%s 
+            and length=%d.""" % (count, "unique " if unique else "", total, excluded_matches, given, length)))
+    tasks = []
+    if count:
+        # Systematic sampling: every block gets its share rounded up or down, and the shares add up to count.
+        offset = generator.random.randrange(total)
+        cumulative = 0
+        previous = 0
+        for prefix, capacity in zip(prefixes, capacities):
+            cumulative += capacity
+            current = (cumulative * count + offset) // total
+            if current > previous:
+                tasks.append((prefix, length, current - previous, capacity, unique, generator.random.getrandbits(64),
+                              excluded[prefix]))
+            previous = current
+    generator.random.shuffle(tasks)
+    return tasks
+
+
+def _generate_blocks(tasks, processes):
+    """Yields the output of ``_generate_block`` for every task, generated by a pool of ``processes`` processes."""
+    if processes == 1 or len(tasks) <= 1:
+        yield from map(_generate_block, tasks)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        # A few blocks per process are queued at a time, so the memory use does not depend on the count. The next
+        # block is queued as soon as the oldest one is written, so the processes do not wait for each other.
+        window = 2 * (processes or os.cpu_count() or 1)
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.apply_async(_generate_block, (task,)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def _generate_block(task):
+    """Generates the BSNs of one block and returns them as lines of text."""
+    prefix, length, count, capacity, unique, seed, excluded = task
+    # If most of the block is needed, picking from all its BSNs is faster than generating them one by one.
+    dense = unique and count * 4 > capacity
+    numpy = _import_numpy()
+    if dense and numpy is not None:
+        return _sample_block(numpy, prefix, length, count, seed, excluded)
+    generator = BSNGenerator(seed)
+    generator.exclude_bsns(excluded)
+    if dense:
+        bsns = generator.random.sample(list(generator.iter_bsns(prefix, length, skip_excluded=True)), count)
+    else:
+        bsns = generator.generate_bsns(count, prefix, length, unique)
+    return "".join(bsn + "\n" for bsn in bsns)
+
+
+def _sample_block(numpy, prefix, length, count, seed, excluded):
+    """
+    Picks ``count`` BSNs at random from all BSNs of one block, like ``_generate_block`` without NumPy, but with array
+    operations. The BSNs are enumerated like ``iter_bsns`` does: the check digit of every combination of the digits
+    after ``prefix`` follows from their weighted sum.
+    """
+    invalid = prefix[:3] == "999"
+    candidates = []
+    for expanded in _expand_prefix(prefix, invalid):
+        free = length - 1 - len(expanded)
+        sums = numpy.zeros(1, dtype=numpy.int64)
+        for pos in range(2, free + 2):
+            sums = (numpy.arange(10)[:, numpy.newaxis] * pos + sums).ravel()
+        check_digits = (_weighted_sum(expanded, length) + sums) % 11
+        heads = (int(expanded) * _POWERS[free] + numpy.arange(_POWERS[free], dtype=numpy.int64)) * 10
+        if invalid:
+            digits = numpy.arange(10)
+            candidates.append((heads[:, numpy.newaxis] + digits)[digits != check_digits[:, numpy.newaxis]])
+        else:
+            candidates.append((heads + check_digits)[check_digits < 10])
+    candidates = numpy.concatenate(candidates)
+    if excluded:
+        candidates = candidates[~numpy.isin(candidates, numpy.array(excluded, dtype=numpy.int64))]
+    numbers = numpy.random.default_rng(seed).choice(candidates, count, replace=False)
+    # Every line is written as bytes: the digits of the BSN and a newline.
+    lines = numpy.empty((count, length + 1), dtype=numpy.uint8)
+    lines[:, :length] = numbers[:, numpy.newaxis] // numpy.array(_POWERS[length - 1::-1]) % 10 + 48
+    lines[:, length] = 10
+    return lines.tobytes().decode('ascii')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,5 +14,5 @@ class NumberNotValid(Error):
 
 
 class FailedToGenerateAllowedBSN(Error):
-    """Raised when after 1000 retries no allowed BSN could be generated."""
+    """Raised when all BSNs permitted by the arguments have been generated or excluded."""
     ROBOT_SUPPRESS_NAME = True
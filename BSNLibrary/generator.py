@@ -0,0 +1,848 @@
+"""
+Generator of BSNs with its own generated and excluded BSNs, for use with or without Robot Framework.
+"""
+
+import functools
+import hashlib
+import itertools
+import operator
+import os
+import random
+import textwrap
+import threading
+import time
+from BSNLibrary import exceptions
+from BSNLibrary.bitmap import BSNBitmap
+from BSNLibrary.pool import BSNPool
+from BSNLibrary.scan import decode_run, find_codes, find_numbers, iter_chunks
+from BSNLibrary.stats import BSNStatistics
+from BSNLibrary.store import (BSNStore, ScopedBSNStore, _BULK_SIZE, _POWERS, _TYPECODE, _encode_batch, _encode_numbers,
+                              _import_numpy, _passes_eleven_test, _weighted_sums)
+
+VALID_LENGTH = {6, 7, 8, 9}
+_RESTRICTED_PREFIXES = ("", "9", "99")
+# Maximum number of rows of a matrix of digits in ``_generate_batch``, so that its memory use does not grow with count.
+_BATCH_ROWS = 100000
+# Weighted sums of the digits after ``given``, per 3 digits, starting with position 2, 5 and 8.
+_SUFFIX_SUMS_2, _SUFFIX_SUMS_5, _SUFFIX_SUMS_8 = _weighted_sums(2), _weighted_sums(5), _weighted_sums(8)
+
+
+class BSNGenerator(object):
+    """
+    Generates BSNs that are unique among the BSNs generated by the same instance and that are not excluded for it.
+
+    All state, i.e. the generated and excluded BSNs, the persistent store, the pool, the statistics and the random
+    generator, belongs to the instance. All methods can be used from multiple threads at the same time, they wait for
+    each other on a lock of the instance. Instances do not share anything, so independent generators in one process
+    do not wait for each other. The keywords of BSNLibrary use one shared instance.
+
+    ``seed`` is used to seed the random generator of the instance. With the same seed and the same calls an instance
+    generates the same BSNs. Without ``seed`` a random seed is drawn, that is kept in attribute ``seed``, so that a run
+    can be replayed. Instances for parallel workers that are given the same ``seed`` and a different ``worker``, e.g.
+    a number or a name, get independent random generators that are derived from ``seed`` and ``worker``.
+
+    Example:
+    | generator = BSNGenerator(seed=42)
+    | bsns = generator.generate_bsns(1000, given="12")
+    | bsn = await generator.generate_bsn_async()
+    | worker_generator = BSNGenerator(seed=42, worker=3)
+    """
+
+    def __init__(self, seed=None, worker=None):
+        self.used_bsns = ScopedBSNStore()
+        self.excluded_bsns = ScopedBSNStore()
+        self.statistics = BSNStatistics()
+        self.random = random.Random()
+        self._persisted_bsns = BSNStore()
+        self._used_and_excluded_bsns = ScopedBSNStore()
+        self._persistent_store = None
+        self._pool = None
+        # Maps the arguments of earlier calls of generate_bsn to the key of their buffer in the pool.
+        self._pool_keys = {}
+        self._lock = threading.RLock()
+        # Serializes opening and closing the pool, which cannot hold the lock while the pool thread stops.
+        self._pool_lock = threading.Lock()
+        self.reseed(seed, worker)
+
+    def reseed(self, seed=None, worker=None):
+        """
+        Seeds the random generator again, see ``BSNGenerator`` for the arguments. BSNs reserved by the pool are
+        released, because they were drawn with the previous seed. Returns the seed.
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        try:
+            seed = int(seed)
+        except (TypeError, ValueError) as e:
+            e.args = ("Value for seed must be a whole number.",)
+            raise
+        with self._lock:
+            if self._pool is not None:
+                self._release(self._pool.flush())
+            self.seed = seed
+            self.worker = None if worker is None else str(worker)
+            self.random.seed(seed if self.worker is None else _derive_seed(seed, self.worker))
+            return seed
+
+    def generate_bsn(self, given="", length=9, unique=True):
+        """Generates a BSN, see keyword `Generate BSN` for the arguments."""
+        pool = self._pool
+        arguments = given, length, unique
+        if pool is not None:
+            # Fast path: with the same arguments as an earlier call, a reserved BSN is taken without checking them.
+            try:
+                key = self._pool_keys.get(arguments)
+            except TypeError:
+                key = arguments = None
+            if key is not None:
+                with self._lock:
+                    generated_bsn = self._take_pooled(pool, key)
+                if generated_bsn is not None:
+                    return generated_bsn
+        given, length, unique = _check_arguments(given, length, unique)
+        with self._lock:
+            pool = self._pool
+            if unique and pool is not None:
+                if arguments is not None:
+                    self._pool_keys[arguments] = given, length
+                generated_bsn = self._take_pooled(pool, (given, length))
+                if generated_bsn is None and pool.fill((given, length)):
+                    # The pool thread did not keep up, a batch costs about as much as a few BSNs one by one.
+                    generated_bsn = self._take_pooled(pool, (given, length))
+                if generated_bsn is not None:
+                    return generated_bsn
+            start = time.perf_counter()
+            retries = self.statistics.retries
+            try:
+                if unique and pool is not None:
+                    generated_bsn = self._generate_pooled(given, length)
+                else:
+                    generated_bsn = self._generate_allowed(given, length, unique)
+            except exceptions.FailedToGenerateAllowedBSN:
+                self.statistics.record_bsn(given, length, self.statistics.retries - retries,
+                                           time.perf_counter() - start, failed=True)
+                raise
+            self.statistics.record_bsn(given, length, self.statistics.retries - retries, time.perf_counter() - start)
+            return generated_bsn
+
+    def generate_bsns(self, count, given="", length=9, unique=True):
+        """Generates a list of ``count`` BSNs, see keyword `Generate BSNs` for the arguments."""
+        try:
+            count = int(count)
+        except (TypeError, ValueError) as e:
+            e.args = ("Value for count must be a positive number.",)
+            raise
+        if count < 0:
+            raise ValueError("Value for count must be a positive number.")
+        given, length, unique = _check_arguments(given, length, unique)
+        with self._lock:
+            if unique:
+                available = self._count_remaining(given, length, True)
+                if available < count and self._pool is not None:
+                    # The BSNs that the pool reserved for later calls of Generate BSN can be generated now.
+                    self._release(self._pool.flush())
+                    available = self._count_remaining(given, length, True)
+                if available < count:
+                    self.statistics.record(given, length, 0, 0, 0.0, failed=True)
+                    raise self._not_enough_bsns(count, available, given, length)
+            start = time.perf_counter()
+            retries = self.statistics.retries
+            generated_bsns = []
+            try:
+                self._generate_list(given, length, unique, count, generated_bsns)
+            except exceptions.FailedToGenerateAllowedBSN:
+                if not unique:
+                    self.statistics.record(given, length, 0, self.statistics.retries - retries,
+                                           time.perf_counter() - start, failed=True)
+                    raise
+                # BSNs that were generated in an earlier run are only known once they are found in the persistent
+                # store, so the check above can pass while too few BSNs are left.
+                self._release(generated_bsns)
+                self.statistics.record(given, length, 0, 0, 0.0, failed=True)
+                raise self._not_enough_bsns(count, self._count_remaining(given, length, True), given, length)
+            self.statistics.record(given, length, count, self.statistics.retries - retries,
+                                   time.perf_counter() - start)
+            return generated_bsns
+
+    async def generate_bsn_async(self, given="", length=9, unique=True):
+        """Same as ``generate_bsn``, but runs in the default executor of the running event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.generate_bsn, given, length, unique))
+
+    async def generate_bsns_async(self, count, given="", length=9, unique=True):
+        """Same as ``generate_bsns``, but runs in the default executor of the running event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.generate_bsns, count, given, length, unique))
+
+    def count_remaining(self, given="", length=9, unique=True):
+        """Returns the number of BSNs that can still be generated, see keyword `Get Remaining BSN Capacity`."""
+        given, length, unique = _check_arguments(given, length, unique)
+        with self._lock:
+            return self._count_remaining(given, length, unique)
+
+    def iter_bsns(self, given="", length=9, skip_generated=False, skip_excluded=False):
+        """Yields all BSNs in a range, see keyword `Find All BSNs In Range` for the arguments."""
+        given, length, _ = _check_arguments(given, length, False)
+        invalid = given[:3] == "999"
+        for prefix in _expand_prefix(given, invalid):
+            base = _weighted_sum(prefix, length)
+            free = length - 2 - len(prefix)
+            weights = range(free + 2, 2, -1)
+            for head in itertools.product(range(10), repeat=free):
+                head_sum = base + sum(map(operator.mul, head, weights))
+                head = prefix + "".join(map(str, head))
+                bsns = []
+                for digit2 in range(10):
+                    check_digit = (head_sum + digit2 * 2) % 11
+                    if invalid:
+                        digits1 = [d for d in range(10) if d != check_digit]
+                    elif check_digit == 10:
+                        continue
+                    else:
+                        digits1 = (check_digit,)
+                    bsns.extend("%s%d%d" % (head, digit2, digit1) for digit1 in digits1)
+                if skip_generated or skip_excluded:
+                    # The BSNs are looked up under the lock, but yielded without it.
+                    with self._lock:
+                        bsns = [bsn for bsn in bsns if not (skip_generated and bsn in self.used_bsns or
+                                                            skip_excluded and bsn in self.excluded_bsns)]
+                yield from bsns
+
+    def get_generated_bsns(self):
+        """Returns a list of the generated BSNs, without the BSNs that are reserved by the pool."""
+        with self._lock:
+            if self._pool is not None:
+                return [bsn for bsn in self.used_bsns if bsn not in self._pool]
+            return list(self.used_bsns)
+
+    def clear_generated_bsns(self):
+        """Clears the generated BSNs. Returns the number of BSNs that were cleared."""
+        with self._lock:
+            if self._pool is not None:
+                self._release(self._pool.flush())
+            count = len(self.used_bsns)
+            self.used_bsns.clear()
+            self._persisted_bsns.clear()
+            self._used_and_excluded_bsns.clear()
+            return count
+
+    def exclude_bsns(self, bsns):
+        """
+        Adds ``bsns`` to the excluded BSNs in one step, see ``BSNStore.update``. Returns the number of BSNs that were
+        not excluded yet.
+        """
+        bsns = [str(bsn) for bsn in bsns]
+        with self._lock:
+            added = self.excluded_bsns.update(bsns)
+            known = len(self.used_bsns) + len(self._persisted_bsns)
+            if added and known:
+                numpy = _import_numpy()
+                # Look up the smaller of the two, update skips the BSNs that are already in the overlap.
+                if numpy is not None and len(bsns) >= _BULK_SIZE:
+                    codes = _encode_batch(numpy, bsns)
+                    found = self.used_bsns._contains_codes(numpy, codes)
+                    found |= self._persisted_bsns._contains_codes(numpy, codes)
+                    overlap = [bsns[index] for index in numpy.flatnonzero(found).tolist()]
+                    # Other strings than BSNs have no code and are looked up one by one.
+                    overlap.extend(bsns[index] for index in numpy.flatnonzero(codes == 0).tolist()
+                                   if bsns[index] in self.used_bsns or bsns[index] in self._persisted_bsns)
+                elif known < len(bsns):
+                    overlap = [bsn for bsn in itertools.chain(self.used_bsns, self._persisted_bsns)
+                               if bsn in self.excluded_bsns]
+                else:
+                    overlap = [bsn for bsn in bsns if bsn in self.used_bsns or bsn in self._persisted_bsns]
+                self._used_and_excluded_bsns.update(overlap)
+            if added and self._pool is not None:
+                self._release(self._pool.discard(self.excluded_bsns))
+        return added
+
+    def exclude_bsns_from_file(self, path, column=None, delimiter=None, encoding='UTF-8'):
+        """
+        Excludes the BSNs in a file, see keyword `Exclude BSNs From File` for the arguments. Returns a dictionary with
+        the number of BSNs that were ``added`` and the number of ``duplicates``.
+        """
+        import gzip
+        path = os.fspath(path)
+        name = path[:-3] if path.lower().endswith('.gz') else path
+        with open(path, 'rb') as bsnfile:
+            compressed = bsnfile.read(2) == b'\x1f\x8b'
+        if compressed:
+            bsnfile = gzip.open(path, 'rt', encoding=encoding, newline='')
+        else:
+            bsnfile = open(path, encoding=encoding, newline='')
+        with bsnfile:
+            if column is not None or name.lower().endswith('.csv'):
+                bsns = _read_csv_column(bsnfile, column, delimiter)
+            else:
+                bsns = (line.strip() for line in bsnfile)
+            bsns = (bsn for bsn in bsns if bsn)
+            added = 0
+            total = 0
+            while True:
+                chunk = list(itertools.islice(bsns, 100000))
+                if not chunk:
+                    break
+                added += self.exclude_bsns(chunk)
+                total += len(chunk)
+        return {'added': added, 'duplicates': total - added}
+
+    def scan_file(self, path, check_known=False, max_reported=1000):
+        """Searches a file for BSNs, see keyword `Scan File For BSNs` for the arguments and the result."""
+        max_reported = int(max_reported)
+        if str(check_known).lower() in ('false', 'none', 'no', 'off', '0'):
+            check_known = False
+        else:
+            check_known = bool(check_known)
+        result = {'count': 0, 'valid': 0, 'invalid': 0, 'invalid_bsns': []}
+        if check_known:
+            result.update(unknown=0, unknown_bsns=[])
+        numpy = _import_numpy()
+        for data, start, end in iter_chunks(path):
+            if numpy is not None:
+                offsets, lengths, numbers = find_codes(numpy, data, start, end)
+                codes = _encode_numbers(numpy, numbers, lengths)
+                # Only the codes of numbers that pass the eleven test start with 1.
+                invalid = numpy.flatnonzero(codes >= 2 * numpy.array(_POWERS)[lengths])
+                number = functools.partial(decode_run, data, offsets, lengths)
+            else:
+                offsets, numbers = find_numbers(data, start, end)
+                invalid = [index for index, number in enumerate(numbers) if not _passes_eleven_test(int(number))]
+                number = numbers.__getitem__
+            result['count'] += len(offsets)
+            result['valid'] += len(offsets) - len(invalid)
+            result['invalid'] += len(invalid)
+            problems = [('invalid', invalid)]
+            if check_known:
+                with self._lock:
+                    if numpy is not None:
+                        codes = codes.astype(_TYPECODE)
+                        known = self.used_bsns._contains_codes(numpy, codes)
+                        known |= self.excluded_bsns._contains_codes(numpy, codes)
+                        known |= self._persisted_bsns._contains_codes(numpy, codes)
+                        if self._persistent_store is not None:
+                            for length in VALID_LENGTH:
+                                selected = numpy.flatnonzero(~known & (lengths == length))
+                                known[selected] = self._persistent_store._contains_numbers(numpy, numbers[selected],
+                                                                                           length)
+                        unknown = numpy.flatnonzero(~known)
+                    else:
+                        unknown = [index for index, bsn in enumerate(numbers) if not self._is_known(bsn)]
+                result['unknown'] += len(unknown)
+                problems.append(('unknown', unknown))
+            for kind, indices in problems:
+                reported = result[kind + '_bsns']
+                reported.extend((int(offsets[index]), number(index))
+                                for index in indices[:max_reported - len(reported)])
+        return result
+
+    def get_excluded_bsns(self):
+        with self._lock:
+            return list(self.excluded_bsns)
+
+    def clear_excluded_bsns(self):
+        with self._lock:
+            self.excluded_bsns.clear()
+            self._used_and_excluded_bsns.clear()
+
+    def enter_scope(self):
+        """
+        Starts a new scope of uniqueness and exclusion on top of the current one. BSNs generated and excluded from now
+        on are forgotten by the matching ``leave_scope``, while the BSNs of the enclosing scopes stay in effect.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._release(self._pool.flush())
+            for store in (self.used_bsns, self.excluded_bsns, self._used_and_excluded_bsns):
+                store.push()
+
+    def leave_scope(self):
+        """
+        Ends the scope started by the last ``enter_scope`` and forgets the BSNs generated and excluded in it. Returns
+        ``False`` if no scope was entered.
+        """
+        with self._lock:
+            if not self.used_bsns.depth:
+                return False
+            if self._pool is not None:
+                self._release(self._pool.flush())
+            for store in (self.used_bsns, self.excluded_bsns, self._used_and_excluded_bsns):
+                store.pop()
+            return True
+
+    def open_persistent_store(self, directory, shared=False):
+        """Opens a persistent store, see keyword `Open Persistent BSN Store`."""
+        with self._lock:
+            self.close_persistent_store()
+            if self._pool is not None:
+                self._release(self._pool.flush())
+            self._persistent_store = BSNBitmap(directory, shared)
+
+    def close_persistent_store(self):
+        """Closes the persistent store. Returns its directory or ``None`` if no store was open."""
+        with self._lock:
+            if self._persistent_store is None:
+                return None
+            if self._pool is not None:
+                self._release(self._pool.flush())
+            self._used_and_excluded_bsns.difference_update(self._persisted_bsns)
+            self._persisted_bsns.clear()
+            self._persistent_store.close()
+            directory = self._persistent_store.directory
+            self._persistent_store = None
+            return directory
+
+    def open_pool(self, size=1000):
+        """Opens a pool of reserved BSNs, see keyword `Open BSN Pool`."""
+        try:
+            size = int(size)
+        except (TypeError, ValueError) as e:
+            e.args = ("Value for size must be a positive number.",)
+            raise
+        if size < 1:
+            raise ValueError("Value for size must be a positive number.")
+        with self._pool_lock:
+            self._close_pool()
+            pool = BSNPool(self._fill_pool, size, self._lock)
+            with self._lock:
+                self._pool = pool
+
+    def close_pool(self):
+        """Closes the pool. Returns the number of released BSNs or ``None`` if no pool was open."""
+        with self._pool_lock:
+            return self._close_pool()
+
+    def get_statistics(self, reset=False):
+        """Returns the statistics as a dictionary, see keyword `Get BSN Generator Statistics`."""
+        with self._lock:
+            statistics = self.statistics.as_dict()
+            if reset:
+                self.statistics.reset()
+            return statistics
+
+    def _close_pool(self):
+        with self._lock:
+            pool = self._pool
+        if pool is None:
+            return None
+        # The pool thread waits for the lock, so the pool is closed without holding it.
+        released = pool.close()
+        with self._lock:
+            self._pool = None
+            return self._release(released)
+
+    def _generate_allowed(self, given, length, unique):
+        generated_bsn = self._generate_validate(given, length, len(given))
+        if unique:
+            generated_bsn = self._check_uniqueness(generated_bsn, given, length)
+        else:
+            generated_bsn = self._check_exclusion(generated_bsn, given, length)
+        return generated_bsn
+
+    def _check_uniqueness(self, generated_bsn, given, length):
+        while not self._reserve(generated_bsn):
+            generated_bsn = self._pick_allowed_bsn(given, length, self._unique_stores())
+        return generated_bsn
+
+    def _reserve(self, generated_bsn):
+        """
+        Adds ``generated_bsn`` to the generated BSNs and to the persistent store, if it is not generated, excluded or
+        stored persistently yet. Returns ``False`` if it is.
+        """
+        if generated_bsn in self.used_bsns:
+            self.statistics.collide("generated")
+            return False
+        if generated_bsn in self.excluded_bsns:
+            self.statistics.collide("excluded")
+            return False
+        if generated_bsn in self._persisted_bsns:
+            self.statistics.collide("persisted")
+            return False
+        if self._persistent_store is not None and not self._persistent_store.add(generated_bsn):
+            self.statistics.collide("persisted")
+            self._persisted_bsns.add(generated_bsn)
+            return False
+        self.used_bsns.add(generated_bsn)
+        return True
+
+    def _release(self, bsns):
+        """Removes BSNs that were reserved but never returned from the generated BSNs and from the persistent store."""
+        self.used_bsns.difference_update(bsns)
+        self._used_and_excluded_bsns.difference_update(bsns)
+        if self._persistent_store is not None:
+            for bsn in bsns:
+                self._persistent_store.discard(bsn)
+        return len(bsns)
+
+    def _take_pooled(self, pool, key):
+        """
+        Returns a BSN reserved by ``pool`` for ``key`` or ``None`` if its buffer is empty. Reserved BSNs are never
+        excluded, because ``exclude_bsns`` takes them out of the pool.
+        """
+        generated_bsn = pool.pop(key)
+        if generated_bsn is not None:
+            self.statistics.take_pooled()
+        return generated_bsn
+
+    def _generate_pooled(self, given, length):
+        try:
+            return self._generate_allowed(given, length, True)
+        except exceptions.FailedToGenerateAllowedBSN:
+            # BSNs reserved for other values of given could be the only ones left.
+            if not self._release(self._pool.flush()):
+                raise
+            return self._generate_allowed(given, length, True)
+
+    def _not_enough_bsns(self, count, available, given, length):
+        invalid = given[:3] == "999"
+        permitted = _count_permitted(given, length, invalid)
+        excluded_matches = _count_stored(given, length, invalid, ((self.excluded_bsns, 1),))
+        return exceptions.FailedToGenerateAllowedBSN(textwrap.dedent("""\
+            'Generate BSNs' was not able to generate %d unique BSNs. Only %d of the %d unique BSNs that are 
+            permitted by %d excluded BSNs and arguments given=%s and length=%d have not been generated 
+            yet. See section Troubleshooting on web page https://haaihenkie.github.io/bsnlibrary/ for 
+            possible solutions.""" % (count, available, permitted - excluded_matches, excluded_matches, given,
+                                      length)))
+
+    def _fill_pool(self, key, count):
+        given, length = key
+        generated_bsns = []
+        checkpoint = self.statistics.checkpoint()
+        start = time.perf_counter()
+        try:
+            self._generate_list(given, length, True, min(count, self._count_remaining(given, length, True)),
+                                generated_bsns)
+        except exceptions.FailedToGenerateAllowedBSN:
+            # The rest is in the persistent store of an earlier run. An empty list marks the key as exhausted.
+            pass
+        self.statistics.record_refill(checkpoint, len(generated_bsns), time.perf_counter() - start)
+        return generated_bsns
+
+    def _count_remaining(self, given, length, unique):
+        invalid = given[:3] == "999"
+        stores = self._unique_stores() if unique else ((self.excluded_bsns, 1),)
+        return _count_permitted(given, length, invalid) - _count_stored(given, length, invalid, stores)
+
+    def _unique_stores(self):
+        return ((self.used_bsns, 1), (self.excluded_bsns, 1), (self._persisted_bsns, 1),
+                (self._used_and_excluded_bsns, -1))
+
+    def _is_known(self, bsn):
+        return bsn in self.used_bsns or bsn in self.excluded_bsns or bsn in self._persisted_bsns or \
+            self._persistent_store is not None and bsn in self._persistent_store
+
+    def _check_exclusion(self, generated_bsn, given, length):
+        if generated_bsn in self.excluded_bsns:
+            self.statistics.collide("excluded")
+            generated_bsn = self._pick_allowed_bsn(given, length, ((self.excluded_bsns, 1),))
+        return generated_bsn
+
+    def _pick_allowed_bsn(self, given, length, stores):
+        """
+        Picks a BSN at random from all BSNs permitted by ``given`` and ``length`` that are not in ``stores``. Instead
+        of retrying random numbers, it draws an index and descends digit by digit to the BSN with that index, skipping
+        prefixes by the number of permitted BSNs minus the number of stored BSNs that start with them.
+        """
+        invalid = given[:3] == "999"
+        permitted = _count_permitted(given, length, invalid)
+        available = permitted - _count_stored(given, length, invalid, stores)
+        if available == 0:
+            excluded_matches = _count_stored(given, length, invalid, ((self.excluded_bsns, 1),))
+            if excluded_matches == permitted:
+                raise exceptions.FailedToGenerateAllowedBSN(textwrap.dedent("""\
+                    'Generate BSN' was not able to generate a BSN outside the list of excluded BSNs. You have 
+                    excluded all %d BSNs that are permitted by arguments given=%s and length=%d. See section 
+                    Troubleshooting on web page https://haaihenkie.github.io/bsnlibrary/ for possible 
+                    solutions.""" % (permitted, given, length)))
+            raise exceptions.FailedToGenerateAllowedBSN(textwrap.dedent("""\
+                'Generate BSN' was not able to generate a unique BSN. You have generated all %d unique BSNs that 
+                are permitted by %d excluded BSNs and arguments given=%s and length=%d. See section 
+                Troubleshooting on web page https://haaihenkie.github.io/bsnlibrary/ for possible 
+                solutions.""" % (permitted - excluded_matches, excluded_matches, given, length)))
+        index = self.random.randrange(available)
+        prefix = given
+        while len(prefix) < length - 1:
+            for digit in _permitted_digits(prefix, invalid):
+                candidate = prefix + str(digit)
+                available = _count_permitted(candidate, length, invalid) - _count_stored(candidate, length, invalid,
+                                                                                         stores)
+                if index < available:
+                    prefix = candidate
+                    break
+                index -= available
+        check_digit = _weighted_sum(prefix, length) % 11
+        for digit in range(10):
+            candidate = prefix + str(digit)
+            if (digit != check_digit) == invalid and not any(candidate in store for store, sign in stores if sign > 0):
+                if index == 0:
+                    return candidate
+                index -= 1
+
+    def _generate_validate(self, given, length, given_length):
+        """
+        Generates a number of ``length`` digits that starts with ``given``, or validates ``given`` if it is as long as
+        ``length``. The digits after ``given`` are drawn as one random integer and the check digit is derived from
+        the weighted sum of ``given``, that is compiled once per ``given`` and ``length`` by ``_compile_prefix``.
+        """
+        if given_length == length:
+            _validate(given)
+            return given
+        prefix_sum, free, low, high, nines, invalid = _compile_prefix(given, length)
+        randrange = self.random.randrange
+        suffix = randrange(low, high)
+        if nines and suffix // nines == 99:
+            # After 99 the third digit is at most 8, so that valid BSNs never start with 999.
+            suffix += (randrange(9) - 9) * nines
+        total = prefix_sum + _SUFFIX_SUMS_2[suffix % 1000] + _SUFFIX_SUMS_5[suffix // 1000 % 1000] + \
+            _SUFFIX_SUMS_8[suffix // 1000000]
+        mod = total % 11
+        if invalid:
+            check_digit = randrange(10) if mod == 10 else (mod + randrange(1, 10)) % 10
+        elif mod == 10:
+            # Replace the digit in position 2 by one of the other 9 digits, which changes the remainder.
+            self.statistics.remainder_fixups += 1
+            digit2 = suffix % 10
+            new_digit2 = (digit2 + randrange(1, 10)) % 10
+            suffix += new_digit2 - digit2
+            check_digit = (total + (new_digit2 - digit2) * 2) % 11
+        else:
+            check_digit = mod
+        return "%s%0*d%d" % (given, free, suffix, check_digit)
+
+    def _generate_list(self, given, length, unique, count, generated_bsns):
+        """
+        Appends generated BSNs to ``generated_bsns`` until it holds ``count`` BSNs and returns it. The list is filled
+        in place, so that the caller can release the BSNs that were reserved if it fails halfway.
+        """
+        numpy = _import_numpy()
+        # The codes of the store, see ``BSNStore``, are the numbers with a leading 1 for valid or 2 for invalid BSNs.
+        base = (2 if given[:3] == "999" else 1) * 10 ** length
+        while numpy is not None and len(generated_bsns) < count:
+            needed = min(count - len(generated_bsns), _BATCH_ROWS)
+            codes = (self._generate_batch(numpy, given, length, needed) + base).astype(_TYPECODE)
+            if unique:
+                bsns = self._reserve_batch(numpy, codes, length)
+            else:
+                excluded = self.excluded_bsns._contains_codes(numpy, codes)
+                self.statistics.collide("excluded", int(excluded.sum()))
+                bsns = _format_batch(numpy, codes[~excluded], length)
+            generated_bsns.extend(bsns)
+            if len(bsns) < needed / 2:
+                break
+        while len(generated_bsns) < count:
+            generated_bsns.append(self._generate_allowed(given, length, unique))
+        return generated_bsns
+
+    def _reserve_batch(self, numpy, codes, length):
+        """
+        Reserves the BSNs with the store codes in the NumPy array ``codes`` the same way as ``_reserve``, but for the
+        whole batch at once. Codes that occur twice in the batch are found with ``numpy.unique``, the others are
+        looked up in the sorted codes of the stores with ``searchsorted`` and only the BSNs that are left are added to
+        the persistent store one by one. The new codes are merged into the generated BSNs in one step. Returns the
+        reserved BSNs in the order of the batch.
+        """
+        new = numpy.zeros(len(codes), dtype=bool)
+        new[numpy.unique(codes, return_index=True)[1]] = True
+        # A code that occurs twice collides with the first one, as if the BSNs were reserved one by one.
+        new &= ~self.used_bsns._contains_codes(numpy, codes)
+        self.statistics.collide("generated", len(codes) - int(new.sum()))
+        for kind, store in (("excluded", self.excluded_bsns), ("persisted", self._persisted_bsns)):
+            found = new & store._contains_codes(numpy, codes)
+            self.statistics.collide(kind, int(found.sum()))
+            new &= ~found
+        codes = codes[new]
+        bsns = _format_batch(numpy, codes, length)
+        if self._persistent_store is not None:
+            stored = [self._persistent_store.add(bsn) for bsn in bsns]
+            if not all(stored):
+                persisted = [bsn for bsn, added in zip(bsns, stored) if not added]
+                self.statistics.collide("persisted", len(persisted))
+                self._persisted_bsns.update(persisted)
+                codes = codes[numpy.array(stored, dtype=bool)]
+                bsns = [bsn for bsn, added in zip(bsns, stored) if added]
+        self.used_bsns._insert_codes(numpy, codes)
+        return bsns
+
+    def _generate_batch(self, numpy, given, length, size):
+        """
+        Generates ``size`` numbers the same way as ``_generate_validate``, but with array operations on a matrix of
+        digits with one row per number. Returns the numbers as a NumPy array of integers. The numbers are not checked
+        against the generated or excluded BSNs.
+        """
+        rng = numpy.random.default_rng(self.random.getrandbits(64))
+        given_length = len(given)
+        digits = rng.integers(0, 10, size=(size, length - 1))
+        for column, d in enumerate(given):
+            digits[:, column] = int(d)
+        if given_length == 0:
+            digits[:, 0] = rng.integers(1, 8, size=size)
+        elif given_length <= 2:
+            nines = (digits[:, 0] == 9) & (digits[:, 1] == 9)
+            digits[nines, 2] = rng.integers(0, 9, size=int(nines.sum()))
+        sum_product = digits @ numpy.arange(length, 1, -1)
+        mod = sum_product % 11
+        if given[:3] == "999":
+            last = numpy.where(mod == 10, rng.integers(0, 10, size=size), (mod + rng.integers(1, 10, size=size)) % 10)
+        else:
+            tens = mod == 10
+            self.statistics.remainder_fixups += int(tens.sum())
+            digit2 = digits[tens, -1]
+            new_digit2 = (digit2 + rng.integers(1, 10, size=digit2.size)) % 10
+            digits[tens, -1] = new_digit2
+            sum_product[tens] += (new_digit2 - digit2) * 2
+            last = sum_product % 11
+        return (digits @ 10 ** numpy.arange(length - 1, 0, -1, dtype=numpy.int64)) + last
+
+
+def _eleven_test_batch(numpy, bsns):
+    # The codes of the store start with 1 for numbers that pass the eleven test and are 0 for anything but ASCII digits.
+    lengths = numpy.fromiter(map(len, bsns), dtype=numpy.int64, count=len(bsns))
+    codes = _encode_batch(numpy, bsns).astype(numpy.int64)
+    return numpy.isin(lengths, sorted(VALID_LENGTH)) & (codes // 10 ** numpy.minimum(lengths, 9) == 1)
+
+
+def _format_batch(numpy, codes, length):
+    """Returns the BSNs of ``length`` digits with the store codes in the NumPy array ``codes`` as a list of strings."""
+    if not len(codes):
+        return []
+    return numpy.char.zfill((codes % 10 ** length).astype(str), length).tolist()
+
+
+@functools.lru_cache(maxsize=4096)
+def _compile_prefix(given, length):
+    """
+    Returns what ``_generate_validate`` needs to know about ``given`` for numbers of ``length`` digits: the weighted
+    sum of ``given``, the number of ``free`` digits between ``given`` and the check digit, the range of these digits
+    as one integer, the place value of the third digit if it may not be 9 after 99, and whether the numbers fail
+    the eleven test.
+    """
+    free = length - 1 - len(given)
+    low, high, nines = 0, 10 ** free, 0
+    if given == "":
+        # The first digit is 1 to 7.
+        low, high = 10 ** (free - 1), 8 * 10 ** (free - 1)
+    elif given == "99":
+        high = 9 * 10 ** (free - 1)
+    elif given == "9":
+        nines = 10 ** (free - 2)
+    return _weighted_sum(given, length), free, low, high, nines, given[:3] == "999"
+
+
+def _validate(bsn):
+    for d in bsn:
+        try:
+            int(d)
+        except (TypeError, ValueError) as e:
+            e.args = ("Character '%s' is not a digit. Only use digits as part of a BSN." % d,)
+            raise
+    if not _passes_eleven_test(int(bsn)):
+        raise exceptions.NumberNotValid("The given number '%s' is not a valid BSN." % bsn)
+
+
+def _derive_seed(seed, worker):
+    """Returns the seed of the random generator of ``worker``, that is the same in every process and Python version."""
+    digest = hashlib.sha256(("%d/%s" % (seed, worker)).encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def _check_arguments(given, length, unique):
+    given = str(given)
+    given_length = len(given)
+    try:
+        length = int(length)
+    except (TypeError, ValueError) as e:
+        e.args = ("Value for length must be 6, 7, 8 or 9.",)
+        raise
+    if length not in VALID_LENGTH:
+        raise ValueError("Value for length must be 6, 7, 8 or 9.")
+    max_length = length - 2
+    if given_length > max_length:
+        raise exceptions.GivenNumberWrongLength(textwrap.dedent("""\
+            The length of the given number, %d digits, exceeds the maximum value. This maximum value equals 
+            'length' argument - 2, in this case %d - 2 = %d.""" % (given_length, length, max_length)))
+    for d in given:
+        if not ('0' <= d <= '9'):
+            raise ValueError("Character '%s' is not a digit. Only use digits as part of a BSN." % d)
+    if str(unique).lower() in ('false', 'none', 'no', 'off', '0') or given_length == length:
+        unique = False
+    else:
+        unique = bool(unique)
+    return given, length, unique
+
+
+def _read_csv_column(bsnfile, column, delimiter):
+    import csv
+    first_line = bsnfile.readline()
+    if delimiter is None:
+        try:
+            delimiter = csv.Sniffer().sniff(first_line, delimiters=',;\t|').delimiter
+        except csv.Error:
+            delimiter = ','
+    rows = csv.reader(itertools.chain([first_line], bsnfile), delimiter=delimiter)
+    header = next(rows, [])
+    if column is None:
+        index = 0
+    elif str(column).isdigit():
+        index = int(column)
+    elif column in header:
+        index = header.index(column)
+    else:
+        raise ValueError("Column '%s' does not exist in the header of the CSV file." % column)
+    if index < len(header) and header[index].strip().isdigit():
+        yield header[index].strip()
+    for row in rows:
+        if index < len(row):
+            yield row[index].strip()
+
+
+def _permitted_digits(prefix, invalid):
+    if prefix == "":
+        return range(1, 8)
+    if prefix == "99" and not invalid:
+        return range(9)
+    return range(10)
+
+
+@functools.lru_cache(maxsize=4096)
+def _count_permitted(prefix, length, invalid):
+    """
+    Returns the number of BSNs of ``length`` digits that start with ``prefix`` and that `Generate BSN` could generate
+    with ``given=prefix``, i.e. the numbers that pass the eleven test or, if ``invalid``, the numbers that fail it.
+    """
+    if prefix in _RESTRICTED_PREFIXES:
+        return sum(_count_permitted(prefix + str(d), length, invalid) for d in _permitted_digits(prefix, invalid))
+    free = length - 1 - len(prefix)
+    valid = 10 ** free - _suffix_sums(free)[(10 - _weighted_sum(prefix, length)) % 11]
+    return 10 ** (free + 1) - valid if invalid else valid
+
+
+def _count_stored(prefix, length, invalid, stores):
+    if prefix in _RESTRICTED_PREFIXES:
+        return sum(_count_stored(prefix + str(d), length, invalid, stores) for d in _permitted_digits(prefix, invalid))
+    return sum(sign * store.count(prefix, length, not invalid) for store, sign in stores)
+
+
+def _weighted_sum(prefix, length):
+    return sum(int(d) * pos for d, pos in zip(prefix, range(length, 1, -1)))
+
+
+@functools.lru_cache(maxsize=None)
+def _suffix_sums(digits):
+    """
+    Returns a list that counts per remainder modulo 11 how many combinations of ``digits`` digits, multiplied by
+    positions 2 and up, add up to that remainder.
+    """
+    if digits == 0:
+        return [1] + [0] * 10
+    previous = _suffix_sums(digits - 1)
+    pos = digits + 1
+    return [sum(previous[(r - d * pos) % 11] for d in range(10)) for r in range(11)]
+
+
+def _expand_prefix(prefix, invalid):
+    if prefix in _RESTRICTED_PREFIXES:
+        for d in _permitted_digits(prefix, invalid):
+            yield from _expand_prefix(prefix + str(d), invalid)
+    else:
+        yield prefix
@@ -0,0 +1,118 @@
+"""
+Pool of BSNs that are generated and reserved in advance by BSNLibrary.
+"""
+
+import collections
+import threading
+import time
+
+
+class BSNPool(object):
+    """
+    Buffers of reserved BSNs per combination of ``given`` and ``length`` that are refilled by a background thread.
+
+    ``fill`` is called with a ``(given, length)`` key and a number of BSNs and returns a list of at most that many newly
+    reserved BSNs. It is called while holding ``lock``, which has to be the same lock that guards the generated and
+    excluded BSNs. An empty list marks the key as exhausted until the pool is flushed.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, fill, size, lock):
+        self.size = size
+        self._fill = fill
+        self._lock = lock
+        self._wanted = threading.Condition(lock)
+        self._buffers = {}
+        self._reserved = set()
+        self._exhausted = set()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="BSNPool", daemon=True)
+        self._thread.start()
+
+    def __contains__(self, bsn):
+        return bsn in self._reserved
+
+    def __len__(self):
+        return len(self._reserved)
+
+    def pop(self, key):
+        """Returns a reserved BSN for ``key`` or ``None`` if its buffer is empty. Asks for a refill when it runs low."""
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer:
+                bsn = buffer.popleft()
+                self._reserved.discard(bsn)
+                # The thread only waits when all buffers are full, so it is woken once when a buffer drops to half.
+                if len(buffer) != self.size // 2:
+                    return bsn
+            else:
+                bsn = None
+                if buffer is None:
+                    self._buffers[key] = collections.deque()
+            if key not in self._exhausted:
+                self._wanted.notify()
+            return bsn
+
+    def discard(self, bsns):
+        """Takes the reserved BSNs that are in ``bsns`` out of the buffers and returns them."""
+        with self._lock:
+            discarded = [bsn for bsn in self._reserved if bsn in bsns]
+            if discarded:
+                self._reserved.difference_update(discarded)
+                for key, buffer in self._buffers.items():
+                    self._buffers[key] = collections.deque(bsn for bsn in buffer if bsn in self._reserved)
+            return discarded
+
+    def fill(self, key):
+        """
+        Reserves a batch of BSNs for ``key``, while the buffer has room and the key is not exhausted. Returns the number
+        of reserved BSNs. Used by the background thread and by a caller that finds the buffer empty.
+        """
+        with self._lock:
+            buffer = self._buffers.setdefault(key, collections.deque())
+            if key in self._exhausted or self._closed or len(buffer) >= self.size:
+                return 0
+            bsns = self._fill(key, min(self.BATCH_SIZE, self.size - len(buffer)))
+            if bsns:
+                buffer.extend(bsns)
+                self._reserved.update(bsns)
+            else:
+                self._exhausted.add(key)
+            return len(bsns)
+
+    def flush(self):
+        """Empties all buffers and returns the BSNs that were reserved but not popped."""
+        with self._lock:
+            released = [bsn for buffer in self._buffers.values() for bsn in buffer]
+            self._buffers.clear()
+            self._reserved.clear()
+            self._exhausted.clear()
+            return released
+
+    def close(self):
+        """Stops the background thread. Returns the BSNs that were reserved but not popped."""
+        with self._lock:
+            self._closed = True
+            self._wanted.notify()
+        self._thread.join()
+        return self.flush()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                key = self._next_key()
+                while key is None and not self._closed:
+                    self._wanted.wait()
+                    key = self._next_key()
+                if self._closed:
+                    return
+                self.fill(key)
+            # Give the thread that is waiting for the lock a chance to take it between two batches.
+            time.sleep(0)
+
+    def _next_key(self):
+        for key, buffer in self._buffers.items():
+            if len(buffer) < self.size and key not in self._exhausted:
+                return key
+        return None
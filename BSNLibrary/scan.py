@@ -0,0 +1,76 @@
+"""
+Search for BSNs embedded in large files, e.g. XML, JSON or fixed-width message dumps.
+"""
+
+import mmap
+import os
+import re
+
+# A run of digits is matched as a whole, so only runs of at most 9 digits are BSNs.
+_RUN = re.compile(rb'[0-9]{6,}')
+_CHUNK_SIZE = 1 << 24
+
+
+def iter_chunks(path, chunk_size=_CHUNK_SIZE):
+    """
+    Yields the memory-mapped file at ``path`` chunk by chunk as ``(data, start, end)``, so it is never read into memory
+    as a whole. No run of digits is split over two chunks. ``data`` is closed when the iteration ends.
+    """
+    with open(path, 'rb') as scanfile:
+        size = os.fstat(scanfile.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(scanfile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                end = min(start + chunk_size, size)
+                # Move the end of the chunk past a run of digits, so that no run is split over two chunks.
+                while end < size and 48 <= data[end] <= 57:
+                    end += 1
+                yield data, start, end
+                start = end
+
+
+def find_numbers(data, start, end):
+    """
+    Returns the byte offsets in ``data`` of the runs of 6 to 9 ASCII digits between ``start`` and ``end``, that are
+    not part of a longer run of digits, and the runs as strings.
+    """
+    offsets = []
+    numbers = []
+    for match in _RUN.finditer(data, start, end):
+        run = match.group()
+        if len(run) < 10:
+            offsets.append(match.start())
+            numbers.append(run.decode('ascii'))
+    return offsets, numbers
+
+
+def find_codes(numpy, data, start, end):
+    """
+    Returns the same runs as ``find_numbers`` as NumPy arrays of their offsets, lengths and numbers, found with array
+    operations on the bytes, so no string is created for any of them.
+    """
+    chunk = numpy.frombuffer(data, dtype=numpy.uint8, count=end - start, offset=start)
+    digits = chunk - 48
+    # With something else than a digit before and after the chunk, the places where a digit follows something else
+    # and the other way around alternate: the start and the end of every run.
+    isdigit = numpy.zeros(len(chunk) + 2, dtype=bool)
+    isdigit[1:-1] = digits < 10
+    changes = numpy.flatnonzero(isdigit[1:] != isdigit[:-1])
+    starts = changes[::2]
+    lengths = changes[1::2] - starts
+    runs = (lengths >= 6) & (lengths <= 9)
+    starts, lengths = starts[runs], lengths[runs]
+    numbers = numpy.zeros(len(starts), dtype=numpy.int64)
+    for column in range(9):
+        inside = column < lengths
+        position = numpy.where(inside, starts + column, 0)
+        numbers = numpy.where(inside, numbers * 10 + digits[position], numbers)
+    return starts + start, lengths, numbers
+
+
+def decode_run(data, offsets, lengths, index):
+    """Returns run ``index`` of the runs found by ``find_codes`` as a string."""
+    offset = offsets[index]
+    return data[offset:offset + lengths[index]].decode('ascii')
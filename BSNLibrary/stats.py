@@ -0,0 +1,103 @@
+"""
+Statistics of the BSNs that are generated by BSNLibrary.
+"""
+
+import collections
+
+COLLISION_KINDS = ("generated", "excluded", "persisted")
+
+
+class BSNStatistics(object):
+    """
+    Counters that are updated while generating BSNs.
+
+    Every time a drawn BSN cannot be used because it was generated, excluded or stored persistently before, this
+    counts as a collision and as a retry of the call that drew it. ``record`` adds a call that generated ``bsns``
+    BSNs with its retries and duration to the totals and to the counters of its ``given`` and ``length``.
+
+    BSNs that are taken from a pool are not counted as calls. The retries, collisions and remainder 10 fix-ups of the
+    background thread that refills the pool are counted separately in ``pool``, so they do not show up as retries of
+    the calls.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.bsns = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.retries = 0
+        self.remainder_fixups = 0
+        self.retry_histogram = collections.Counter()
+        self.collisions = dict.fromkeys(COLLISION_KINDS, 0)
+        self.prefixes = {}
+        self.pool = {'taken': 0, 'refills': 0, 'bsns': 0, 'seconds': 0.0, 'retries': 0,
+                     'collisions': dict.fromkeys(COLLISION_KINDS, 0), 'remainder_10_fixups': 0}
+
+    def collide(self, kind, count=1):
+        self.collisions[kind] += count
+        self.retries += count
+
+    def record_bsn(self, given, length, retries, seconds, failed=False):
+        """Records a call of `Generate BSN` and adds its ``retries`` to the histogram of retries per call."""
+        self.retry_histogram[retries] += 1
+        self.record(given, length, 0 if failed else 1, retries, seconds, failed)
+
+    def record(self, given, length, bsns, retries, seconds, failed=False):
+        self.calls += 1
+        self.bsns += bsns
+        self.failures += failed
+        self.seconds += seconds
+        prefix = self.prefixes.get((given, length))
+        if prefix is None:
+            prefix = self.prefixes[(given, length)] = {'given': given, 'length': length, 'calls': 0, 'bsns': 0,
+                                                       'retries': 0, 'failures': 0, 'seconds': 0.0}
+        prefix['calls'] += 1
+        prefix['bsns'] += bsns
+        prefix['retries'] += retries
+        prefix['failures'] += failed
+        prefix['seconds'] += seconds
+
+    def take_pooled(self):
+        self.pool['taken'] += 1
+
+    def checkpoint(self):
+        """Returns the counters that ``record_refill`` moves to the counters of the pool."""
+        return self.retries, dict(self.collisions), self.remainder_fixups
+
+    def record_refill(self, checkpoint, bsns, seconds):
+        """
+        Records a refill of the pool that generated ``bsns`` BSNs and moves the retries, collisions and remainder 10
+        fix-ups since ``checkpoint`` from the counters of the calls to the counters of the pool.
+        """
+        retries, collisions, remainder_fixups = checkpoint
+        pool = self.pool
+        pool['refills'] += 1
+        pool['bsns'] += bsns
+        pool['seconds'] += seconds
+        pool['retries'] += self.retries - retries
+        self.retries = retries
+        for kind, count in collisions.items():
+            pool['collisions'][kind] += self.collisions[kind] - count
+        self.collisions = collisions
+        pool['remainder_10_fixups'] += self.remainder_fixups - remainder_fixups
+        self.remainder_fixups = remainder_fixups
+
+    def as_dict(self):
+        """Returns the counters as a dictionary of numbers, dictionaries and lists that can be logged or compared."""
+        return {
+            'calls': self.calls,
+            'bsns': self.bsns,
+            'failures': self.failures,
+            'seconds': round(self.seconds, 6),
+            'retries': self.retries,
+            'retry_histogram': dict(sorted(self.retry_histogram.items())),
+            'collisions': dict(self.collisions),
+            'remainder_10_fixups': self.remainder_fixups,
+            'prefixes': sorted((dict(prefix, seconds=round(prefix['seconds'], 6))
+                                for prefix in self.prefixes.values()),
+                               key=lambda prefix: (-prefix['retries'], -prefix['calls'])),
+            'pool': dict(self.pool, seconds=round(self.pool['seconds'], 6), collisions=dict(self.pool['collisions'])),
+        }
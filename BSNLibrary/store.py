@@ -0,0 +1,466 @@
+"""
+Store for the BSNs that are generated or excluded by BSNLibrary.
+"""
+
+import array
+import bisect
+
+_TYPECODE = 'I' if array.array('I').itemsize >= 4 else 'L'
+_POWERS = [10 ** length for length in range(10)]
+# Number of BSNs from which ``update`` and ``difference_update`` handle them all at once instead of one by one.
+_BULK_SIZE = 256
+# Number of codes up to which single new codes are inserted in the smallest sorted run instead of starting a new one.
+_PENDING_SIZE = 1024
+# Every sorted run is kept more than this many times as long as the next one, by merging the smallest runs.
+_RUN_FACTOR = 4
+# Number of codes that are converted to Python integers or encoded with NumPy at a time.
+_BLOCK_SIZE = 65536
+
+
+class BSNStore(object):
+    """
+    Insertion ordered set of BSNs that takes about 10 bytes per BSN.
+
+    BSNs of at most 9 digits are encoded as a 32-bit code: a leading 1 for a number that passes the eleven test or a
+    leading 2 for one that fails it, followed by the digits, e.g. 1123456782 for BSN '123456782'. Codes of different
+    lengths never overlap, because the leading digit also fixes the length. The codes are kept in an array in
+    insertion order and in a few sorted arrays, called runs, so all BSNs of one length and outcome of the eleven test
+    that start with the same digits form one contiguous range in each run. Every run is more than ``_RUN_FACTOR`` times
+    as long as the next one, so there are only a few. A single new code is inserted in the smallest run while it is
+    small, many new codes are sorted into a new run. When a run grows too long compared to the run before it, the two
+    are merged in one linear pass, with NumPy if it is installed. Like in a log-structured merge tree every code is only
+    merged a few times, so adding BSNs takes time in proportion to their number and not to the size of the store.
+    Membership is a binary search in each run and counting the BSNs that start with certain digits is two binary
+    searches in each. Strings are only created again when the BSNs are iterated.
+
+    Other strings, e.g. with letters or more than 9 digits, can be stored as well and are kept in a dictionary.
+    """
+
+    def __init__(self, bsns=()):
+        self.clear()
+        self.update(bsns)
+
+    def __contains__(self, bsn):
+        if not self._order:
+            return False
+        code = _encode(bsn) if type(bsn) is str else None
+        if code is None:
+            return bsn in self._others
+        return self._contains_code(code)
+
+    def __iter__(self):
+        others = iter(self._others)
+        for code in self._order:
+            yield next(others) if code == 0 else str(code)[1:]
+
+    def __len__(self):
+        return len(self._order)
+
+    def add(self, bsn):
+        """Adds ``bsn`` to the store. Returns ``False`` if it was already stored."""
+        bsn = str(bsn)
+        code = _encode(bsn)
+        if code is None:
+            if bsn in self._others:
+                return False
+            self._others[bsn] = None
+            code = 0
+        elif self._contains_code(code):
+            return False
+        elif self._runs and len(self._runs[-1]) < _PENDING_SIZE:
+            bisect.insort(self._runs[-1], code)
+            self._compact()
+        else:
+            self._add_run(array.array(_TYPECODE, (code,)))
+        self._order.append(code)
+        return True
+
+    def discard(self, bsn):
+        """Removes ``bsn`` from the store if it is stored."""
+        self.difference_update((bsn,))
+
+    def update(self, bsns):
+        """Adds all ``bsns`` to the store. Returns the number of BSNs that were not stored yet."""
+        bsns = [str(bsn) for bsn in bsns]
+        if len(bsns) < _BULK_SIZE:
+            return sum(self.add(bsn) for bsn in bsns)
+        return self._update(bsns, (self,))
+
+    def difference_update(self, bsns):
+        """Removes all ``bsns`` from the store that are stored. Returns the number of removed BSNs."""
+        bsns = [str(bsn) for bsn in bsns]
+        numpy = _import_numpy() if len(bsns) >= _BULK_SIZE and self._order else None
+        if numpy is not None:
+            codes = _encode_batch(numpy, bsns)
+            removed = numpy.unique(codes[self._contains_codes(numpy, codes)])
+            others = {bsns[index]: None for index in numpy.flatnonzero(codes == 0).tolist()
+                      if bsns[index] in self._others}
+        else:
+            removed = set()
+            others = {}
+            for bsn in bsns:
+                code = _encode(bsn)
+                if code is None:
+                    if bsn in self._others:
+                        others[bsn] = None
+                elif self._contains_code(code):
+                    removed.add(code)
+        if len(removed) <= 16 and not others:
+            for code in removed:
+                code = int(code)
+                for run in self._runs:
+                    index = _find(run, code)
+                    if index is not None:
+                        del run[index]
+                        break
+                self._order.remove(code)
+            self._runs = [run for run in self._runs if run]
+            return len(removed)
+        self._merge()
+        removed_sorted = sorted(removed) if numpy is None else removed
+        self._runs = [run for run in (_remove_sorted(run, removed_sorted) for run in self._runs) if run]
+        # The other strings are in the same order in the dictionary as their placeholders in the order array.
+        kept_others = [bsn not in others for bsn in self._others]
+        if numpy is not None:
+            order = numpy.frombuffer(self._order, dtype=_TYPECODE)
+            keep = ~numpy.isin(order, removed)
+            keep[order == 0] = kept_others
+            self._order = _to_array(order[keep])
+        else:
+            kept_others = iter(kept_others)
+            self._order = array.array(_TYPECODE, (code for code in self._order
+                                                  if (next(kept_others) if code == 0 else code not in removed)))
+        for bsn in others:
+            del self._others[bsn]
+        return len(removed) + len(others)
+
+    def clear(self):
+        self._order = array.array(_TYPECODE)
+        self._runs = []
+        self._others = {}
+
+    def count(self, given, length, valid=None):
+        """
+        Returns the number of stored BSNs of ``length`` digits that start with ``given``. With ``valid`` set to
+        ``True`` or ``False`` only the BSNs that pass or fail the eleven test are counted.
+        """
+        if given and not (given.isascii() and given.isdigit()):
+            return 0
+        if valid is None:
+            return self.count(given, length, True) + self.count(given, length, False)
+        power = _POWERS[length - len(given)]
+        low = (1 if valid else 2) * _POWERS[length] + (int(given) * power if given else 0)
+        return sum(bisect.bisect_left(run, low + power) - bisect.bisect_left(run, low) for run in self._runs)
+
+    def _contains_code(self, code):
+        for run in self._runs:
+            if _find(run, code) is not None:
+                return True
+        return False
+
+    def _contains_codes(self, numpy, codes):
+        """Returns a NumPy array that tells for every code in the NumPy array ``codes`` if it is stored."""
+        # Looking up the codes in sorted order touches the stored codes in order too, which is much faster.
+        order = numpy.argsort(codes)
+        codes = codes[order]
+        found = numpy.zeros(len(codes), dtype=bool)
+        for run in self._runs:
+            stored = numpy.frombuffer(run, dtype=_TYPECODE)
+            found[order] |= stored[numpy.searchsorted(stored, codes) % len(stored)] == codes
+        return found
+
+    def _update(self, bsns, stores):
+        """
+        Adds the strings ``bsns`` that are in none of ``stores``, which include this store, in one pass. Returns the
+        number of added BSNs.
+        """
+        numpy = _import_numpy()
+        if numpy is None:
+            new_codes = {}
+            order = array.array(_TYPECODE)
+            for bsn in bsns:
+                code = _encode(bsn)
+                if code is None:
+                    if any(bsn in store._others for store in stores):
+                        continue
+                    self._others[bsn] = None
+                    order.append(0)
+                elif code not in new_codes and not any(store._contains_code(code) for store in stores):
+                    new_codes[code] = None
+                    order.append(code)
+            if new_codes:
+                self._add_run(array.array(_TYPECODE, sorted(new_codes)))
+            self._order.extend(order)
+            return len(order)
+        codes = _encode_batch(numpy, bsns)
+        new = numpy.zeros(len(codes), dtype=bool)
+        new[numpy.unique(codes, return_index=True)[1]] = True
+        for store in stores:
+            new &= ~store._contains_codes(numpy, codes)
+        for index in numpy.flatnonzero(codes == 0).tolist():
+            bsn = bsns[index]
+            new[index] = not any(bsn in store._others for store in stores)
+            if new[index]:
+                self._others[bsn] = None
+        codes = codes[new]
+        self._insert_codes(numpy, codes)
+        return len(codes)
+
+    def _insert_codes(self, numpy, codes):
+        """
+        Adds the codes in the NumPy array ``codes``, that are all new and different, in their order. A code 0 is the
+        placeholder of an other string that is already added to the dictionary.
+        """
+        self._order.frombytes(codes.astype(_TYPECODE).data.cast('B'))
+        codes = codes[codes != 0]
+        if len(codes):
+            self._add_run(_to_array(numpy.sort(codes)))
+
+    def _add_run(self, run):
+        self._runs.append(run)
+        self._compact()
+
+    def _compact(self):
+        """Merges the smallest runs until every run is more than ``_RUN_FACTOR`` times as long as the next one."""
+        runs = self._runs
+        while len(runs) > 1 and len(runs[-1]) * _RUN_FACTOR >= len(runs[-2]):
+            run = runs.pop()
+            runs[-1] = _merge_sorted(runs[-1], run)
+
+    def _merge(self):
+        """Merges all runs into one."""
+        while len(self._runs) > 1:
+            run = self._runs.pop()
+            self._runs[-1] = _merge_sorted(self._runs[-1], run)
+
+
+class ScopedBSNStore(object):
+    """
+    Stack of ``BSNStore`` objects with the same methods as one ``BSNStore``, that holds the union of the stores.
+
+    The bottom store holds the BSNs of the whole run. ``push`` starts a new scope with an empty store on top of the
+    stack, to which new BSNs are added, and ``pop`` drops the top store with the BSNs that were added since the
+    matching ``push``. A BSN is only added if no store in the stack holds it, so the stores never overlap and the
+    number of BSNs is the sum of their numbers.
+    """
+
+    def __init__(self, bsns=()):
+        self._scopes = [BSNStore(bsns)]
+
+    def __contains__(self, bsn):
+        for scope in self._scopes:
+            if bsn in scope:
+                return True
+        return False
+
+    def __iter__(self):
+        for scope in self._scopes:
+            yield from scope
+
+    def __len__(self):
+        return sum(len(scope) for scope in self._scopes)
+
+    @property
+    def depth(self):
+        """The number of scopes on top of the bottom store."""
+        return len(self._scopes) - 1
+
+    def push(self):
+        self._scopes.append(BSNStore())
+
+    def pop(self):
+        """Drops the top store. Returns the number of BSNs it held. The bottom store is never dropped."""
+        if len(self._scopes) == 1:
+            return 0
+        return len(self._scopes.pop())
+
+    def add(self, bsn):
+        """Adds ``bsn`` to the top store. Returns ``False`` if it was already stored in any store."""
+        bsn = str(bsn)
+        for scope in self._scopes[:-1]:
+            if bsn in scope:
+                return False
+        return self._scopes[-1].add(bsn)
+
+    def discard(self, bsn):
+        self.difference_update((bsn,))
+
+    def update(self, bsns):
+        bsns = [str(bsn) for bsn in bsns]
+        if len(bsns) < _BULK_SIZE:
+            return sum(self.add(bsn) for bsn in bsns)
+        return self._scopes[-1]._update(bsns, self._scopes)
+
+    def difference_update(self, bsns):
+        bsns = [str(bsn) for bsn in bsns]
+        return sum(scope.difference_update(bsns) for scope in self._scopes)
+
+    def clear(self):
+        """Removes all BSNs from all stores, but keeps the scopes."""
+        for scope in self._scopes:
+            scope.clear()
+
+    def count(self, given, length, valid=None):
+        return sum(scope.count(given, length, valid) for scope in self._scopes)
+
+    def _contains_codes(self, numpy, codes):
+        found = numpy.zeros(len(codes), dtype=bool)
+        for scope in self._scopes:
+            found |= scope._contains_codes(numpy, codes)
+        return found
+
+    def _insert_codes(self, numpy, codes):
+        self._scopes[-1]._insert_codes(numpy, codes)
+
+
+def _merge_sorted(codes, new_codes):
+    """
+    Returns an array with the codes of the sorted array ``codes`` and the sorted codes ``new_codes``, that are not in
+    ``codes``, in linear time. Without NumPy the codes are merged block by block, so only one block at a time is
+    converted to a list of integers.
+    """
+    numpy = _import_numpy()
+    if numpy is not None:
+        stored = numpy.frombuffer(codes, dtype=_TYPECODE)
+        new_codes = numpy.asarray(new_codes, dtype=_TYPECODE)
+        return _to_array(numpy.insert(stored, numpy.searchsorted(stored, new_codes), new_codes))
+    merged = array.array(_TYPECODE)
+    if len(new_codes) * 16 < len(codes):
+        # Few new codes: copy the slices of codes between them, without converting any codes.
+        start = 0
+        for code in new_codes:
+            index = bisect.bisect_left(codes, code, start)
+            merged.extend(codes[start:index])
+            merged.append(code)
+            start = index
+        merged.extend(codes[start:])
+        return merged
+    new_start = 0
+    for start in range(0, len(codes), _BLOCK_SIZE):
+        block = codes[start:start + _BLOCK_SIZE]
+        if start + _BLOCK_SIZE < len(codes):
+            new_end = bisect.bisect_left(new_codes, block[-1], new_start)
+        else:
+            new_end = len(new_codes)
+        if new_end == new_start:
+            merged.extend(block)
+        else:
+            # Sorting two sorted runs one after the other takes linear time.
+            block = block.tolist()
+            block.extend(new_codes[new_start:new_end])
+            block.sort()
+            merged.fromlist(block)
+        new_start = new_end
+    merged.extend(array.array(_TYPECODE, new_codes[new_start:]))
+    return merged
+
+
+def _remove_sorted(codes, removed_codes):
+    """Returns an array with the codes of the sorted array ``codes`` without the sorted codes ``removed_codes``."""
+    numpy = _import_numpy()
+    if numpy is not None:
+        stored = numpy.frombuffer(codes, dtype=_TYPECODE)
+        keep = numpy.ones(len(stored), dtype=bool)
+        keep[numpy.searchsorted(stored, numpy.asarray(removed_codes, dtype=_TYPECODE))] = False
+        return _to_array(stored[keep])
+    kept = array.array(_TYPECODE)
+    start = 0
+    for code in removed_codes:
+        index = bisect.bisect_left(codes, code, start)
+        kept.extend(codes[start:index])
+        start = index + 1
+    kept.extend(codes[start:])
+    return kept
+
+
+def _to_array(codes):
+    result = array.array(_TYPECODE)
+    result.frombytes(codes.astype(_TYPECODE, copy=False).data.cast('B'))
+    return result
+
+
+def _find(codes, code):
+    index = bisect.bisect_left(codes, code)
+    return index if index < len(codes) and codes[index] == code else None
+
+
+def _encode(bsn):
+    # The same BSN is often looked up in several stores in a row, so the last code is remembered.
+    global _last_encoded
+    last_bsn, code = _last_encoded
+    if last_bsn is bsn:
+        return code
+    code = None
+    if 0 < len(bsn) < 10 and bsn.isascii() and bsn.isdigit():
+        number = int(bsn)
+        code = (1 if _passes_eleven_test(number) else 2) * _POWERS[len(bsn)] + number
+    _last_encoded = bsn, code
+    return code
+
+
+_last_encoded = None, None
+
+
+def _encode_batch(numpy, bsns):
+    """
+    Returns a NumPy array with the code of every string in the list ``bsns``, the same as ``_encode`` but with array
+    operations, and 0 for the strings that ``_encode`` does not encode. Only ASCII digits count as digits.
+    """
+    if len(bsns) > _BLOCK_SIZE:
+        return numpy.concatenate([_encode_batch(numpy, bsns[start:start + _BLOCK_SIZE])
+                                  for start in range(0, len(bsns), _BLOCK_SIZE)])
+    lengths = numpy.fromiter(map(len, bsns), dtype=numpy.int64, count=len(bsns))
+    # Longer strings are cut off at 10 characters, which is enough to tell that they are too long.
+    chars = numpy.array(bsns, dtype='U10').view(numpy.uint32).reshape(len(bsns), 10)[:, :9].astype(numpy.int64)
+    digits = chars - 48
+    positions = numpy.arange(9) < lengths[:, numpy.newaxis]
+    encoded = ((lengths > 0) & (lengths < 10) & (((digits >= 0) & (digits <= 9)) | ~positions).all(axis=1))
+    digits[~positions | ~encoded[:, numpy.newaxis]] = 0
+    numbers = numpy.zeros(len(bsns), dtype=numpy.int64)
+    for column in range(9):
+        numbers = numpy.where(positions[:, column], numbers * 10 + digits[:, column], numbers)
+    codes = _encode_numbers(numpy, numbers, numpy.minimum(lengths, 9))
+    return numpy.where(encoded, codes, 0).astype(_TYPECODE)
+
+
+def _encode_numbers(numpy, numbers, lengths):
+    """
+    Returns a NumPy array with the codes of the numbers in the NumPy array ``numbers``, written with the number of
+    digits in the NumPy array ``lengths``.
+    """
+    remainder = -(numbers % 10)
+    rest = numbers // 10
+    for pos in range(2, 10):
+        remainder += rest % 10 * pos
+        rest //= 10
+    return numpy.where(remainder % 11 == 0, 1, 2) * numpy.array(_POWERS)[lengths] + numbers
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _weighted_sums(first_pos):
+    """Returns the weighted sum of every 3 digit number with its last digit in position ``first_pos``."""
+    weight1, weight2, weight3 = [-1 if pos == 1 else pos for pos in range(first_pos, first_pos + 3)]
+    return [n % 10 * weight1 + n // 10 % 10 * weight2 + n // 100 * weight3 for n in range(1000)]
+
+
+_SUMS_1, _SUMS_4, _SUMS_7 = _weighted_sums(1), _weighted_sums(4), _weighted_sums(7)
+
+
+def _passes_eleven_test(number):
+    if number < 1000000000:
+        return (_SUMS_1[number % 1000] + _SUMS_4[number // 1000 % 1000] + _SUMS_7[number // 1000000]) % 11 == 0
+    remainder = -(number % 10)
+    number //= 10
+    pos = 2
+    while number:
+        remainder += number % 10 * pos
+        number //= 10
+        pos += 1
+    return remainder % 11 == 0
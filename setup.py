@@ -36,8 +36,11 @@ setup(
             'tests/BSNLibrary_test/1_Functional_tests.robot',
             'tests/BSNLibrary_test/2_Error_handling.robot',
             'tests/BSNLibrary_test/3_Demos.robot',
+            'tests/BSNLibrary_test/4_Scopes.robot',
             'tests/BSNLibrary_test/Resource.robot'])
     ],
+    entry_points={'console_scripts': ['bsngenerator = BSNLibrary.cli:main']},
     install_requires=['robotframework'],
+    extras_require={'numpy': ['numpy']},
     python_requires='>=3'
 )
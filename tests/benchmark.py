@@ -0,0 +1,278 @@
+"""
+Benchmarks for BSNLibrary.
+
+Measures the import time of BSNLibrary and the throughput and latency percentiles of generating, validating and
+excluding BSNs and writes the results as JSON, so results of different versions can be compared. Runs locally, without
+Robot Framework test runner or network.
+
+Usage:
+    python tests/benchmark.py [--quick] [--output results.json] [--compare baseline.json] [--tolerance 0.25]
+
+With ``--compare`` every case is compared with the case with the same name in the baseline file. The script exits
+with status 1 if the throughput of any case dropped by more than ``--tolerance``.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import BSNLibrary  # noqa: E402
+from BSNLibrary import exceptions  # noqa: E402
+
+REPEAT = 3
+
+
+def measure(name, params, call, calls, setup=None):
+    """
+    Calls ``call`` ``calls`` times and returns a result with throughput and latency percentiles. This is repeated
+    ``REPEAT`` times and the fastest repetition is kept, which makes the results less sensitive to noise. ``setup`` is
+    called before every repetition, but not measured, e.g. to undo what the previous repetition changed.
+    """
+    fastest = None
+    for _ in range(REPEAT):
+        if setup is not None:
+            setup()
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(calls):
+            before = time.perf_counter_ns()
+            call()
+            latencies.append(time.perf_counter_ns() - before)
+        total = time.perf_counter() - start
+        if fastest is None or total < fastest[0]:
+            fastest = total, latencies
+    total, latencies = fastest
+    latencies.sort()
+    return {
+        'name': name,
+        'params': params,
+        'calls': calls,
+        'seconds': round(total, 6),
+        'ops_per_sec': round(calls / total, 1) if total else None,
+        'p50_us': percentile(latencies, 50),
+        'p90_us': percentile(latencies, 90),
+        'p99_us': percentile(latencies, 99),
+        'max_us': round(latencies[-1] / 1000, 3),
+    }
+
+
+def percentile(latencies, p):
+    index = min(len(latencies) - 1, len(latencies) * p // 100)
+    return round(latencies[index] / 1000, 3)
+
+
+def reset():
+    BSNLibrary.close_bsn_pool()
+    BSNLibrary.close_persistent_bsn_store()
+    BSNLibrary.clear_generated_bsns()
+    BSNLibrary.clear_excluded_bsns()
+
+
+def bench_given_and_length(scale):
+    results = []
+    for length in (6, 7, 8, 9):
+        for given in ("", "12", "1234"):
+            if length - len(given) < 4:
+                continue
+            reset()
+            permitted = BSNLibrary.get_remaining_bsn_capacity(given, length, False)
+            results.append(measure("generate_bsn/given=%d/length=%d" % (len(given), length),
+                                   {'given_length': len(given), 'length': length},
+                                   lambda: BSNLibrary.generate_bsn(given, length),
+                                   min(scale, permitted // 2 // REPEAT)))
+    return results
+
+
+def bench_store_sizes(scale):
+    results = []
+    for size in (0, 10 * scale, 100 * scale):
+        reset()
+        BSNLibrary.generate_bsns(size)
+        results.append(measure("generate_bsn/used=%d" % size, {'used_bsns': size},
+                               BSNLibrary.generate_bsn, scale))
+        reset()
+        BSNLibrary.exclude_bsns(BSNLibrary.generate_bsns(size, unique=False))
+        results.append(measure("generate_bsn/excluded=%d" % size, {'excluded_bsns': size},
+                               BSNLibrary.generate_bsn, scale))
+    return results
+
+
+def bench_large_store(scale):
+    """
+    Measures `Generate BSN` with a million generated BSNs, in quick runs too, because the cost of a call should not
+    grow with the number of generated BSNs. About 1% of the calls collide with a generated BSN, so enough calls are
+    made to include many collisions.
+    """
+    size = 1000000
+    reset()
+    BSNLibrary.generate_bsns(size)
+    result = measure("generate_bsn/used=%d" % size, {'used_bsns': size}, BSNLibrary.generate_bsn, 10 * scale)
+    reset()
+    return [result]
+
+
+def bench_exclude_file(scale):
+    """
+    Measures `Exclude BSNs From File` with a gzip file of a million BSNs, in quick runs too, because the time to load
+    a file should grow in proportion to its size. The excluded BSNs are cleared before every repetition.
+    """
+    size = 1000000
+    reset()
+    bsns = BSNLibrary.generate_bsns(size, unique=False)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bsns.txt.gz')
+        with gzip.open(path, 'wt', compresslevel=1) as bsnfile:
+            bsnfile.write("\n".join(bsns))
+        result = measure("exclude_bsns_from_file/count=%d" % size, {'count': size},
+                         lambda: BSNLibrary.exclude_bsns_from_file(path), 1, setup=BSNLibrary.clear_excluded_bsns)
+    reset()
+    return [result]
+
+
+def bench_fill_ratio(scale):
+    """Generates all BSNs permitted by one ``given`` and measures each step up to the exception at the end."""
+    results = []
+    given, length = "1234", 9
+    permitted = BSNLibrary.find_all_bsns_in_range(given, length)
+    calls = min(scale, len(permitted) // 100 // REPEAT)
+    reset()
+    generated = 0
+    for ratio in (0, 50, 90, 99, 100):
+        target = len(permitted) * ratio // 100
+        BSNLibrary.generate_bsns(target - generated, given, length)
+        generated = target
+        if ratio == 100:
+            break
+        result = measure("generate_bsn/fill=%d%%" % ratio, {'fill_ratio': ratio, 'permitted': len(permitted)},
+                         lambda: BSNLibrary.generate_bsn(given, length), calls)
+        generated += calls * REPEAT
+        results.append(result)
+
+    def exhausted():
+        try:
+            BSNLibrary.generate_bsn(given, length)
+        except exceptions.FailedToGenerateAllowedBSN:
+            return
+        raise AssertionError("Expected FailedToGenerateAllowedBSN")
+    results.append(measure("generate_bsn/fill=100%", {'fill_ratio': 100, 'permitted': len(permitted)},
+                           exhausted, calls))
+    return results
+
+
+def bench_lists(scale):
+    results = []
+    size = 100 * scale
+    reset()
+    bsns = BSNLibrary.generate_bsns(size, unique=False)
+    results.append(measure("generate_bsns/count=%d" % size, {'count': size},
+                           lambda: BSNLibrary.generate_bsns(size, unique=False), 1))
+    iterator = iter(bsns)
+    results.append(measure("validate_bsn", {}, lambda: BSNLibrary.validate_bsn(next(iterator)), scale))
+    results.append(measure("validate_bsns/count=%d" % size, {'count': size},
+                           lambda: BSNLibrary.validate_bsns(bsns), 1))
+    results.append(measure("exclude_bsns/count=%d" % size, {'count': size},
+                           lambda: BSNLibrary.exclude_bsns(bsns), 1, setup=BSNLibrary.clear_excluded_bsns))
+    reset()
+    results.append(measure("generate_bsn/no_pool", {}, BSNLibrary.generate_bsn, 10 * scale))
+    reset()
+    BSNLibrary.open_bsn_pool()
+    results.append(measure("generate_bsn/pool", {'pool_size': 1000}, BSNLibrary.generate_bsn, 10 * scale))
+    reset()
+    return results
+
+
+def bench_import(scale):
+    """
+    Measures the time to import BSNLibrary in a new Python process with ``-X importtime``, which only counts the
+    imports and not the start of the interpreter. Also checks that Robot Framework is not imported.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    code = "import sys, BSNLibrary; print('robot' in sys.modules)"
+    timings = []
+    for _ in range(6 if scale < 1000 else 21):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env, capture_output=True,
+                                 text=True, check=True)
+        last_line = [line for line in process.stderr.splitlines() if line.endswith('| BSNLibrary')][-1]
+        timings.append(int(last_line.split('|')[1]))
+    # The first import may have to compile the modules, so it is not counted.
+    timings = sorted(timings[1:])
+    return [{
+        'name': 'import BSNLibrary',
+        'params': {'robot_imported': process.stdout.strip() == 'True'},
+        'calls': len(timings),
+        'seconds': round(sum(timings) / 1e6, 6),
+        'ops_per_sec': round(1e6 / timings[0], 1),
+        'p50_us': timings[len(timings) // 2],
+        'p90_us': timings[len(timings) * 9 // 10],
+        'p99_us': timings[-1],
+        'max_us': timings[-1],
+    }]
+
+
+def compare(results, baseline, tolerance):
+    baseline = {result['name']: result for result in baseline['results']}
+    regressions = 0
+    for result in results:
+        old = baseline.get(result['name'])
+        if not old or not old['ops_per_sec'] or not result['ops_per_sec']:
+            continue
+        ratio = result['ops_per_sec'] / old['ops_per_sec']
+        regression = ratio < 1 - tolerance
+        regressions += regression
+        print("%-40s %12.1f -> %12.1f ops/s  %6.2fx%s" % (result['name'], old['ops_per_sec'],
+                                                          result['ops_per_sec'], ratio,
+                                                          "  REGRESSION" if regression else ""))
+    return regressions
+
+
+def main(argv=None):
+    global REPEAT
+    parser = argparse.ArgumentParser(description="Benchmarks for BSNLibrary")
+    parser.add_argument('--quick', action='store_true', help="run with fewer calls, e.g. as a smoke test")
+    parser.add_argument('--output', help="file to write the JSON results to, default is standard output")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="maximum relative drop in throughput before a case counts as a regression")
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help="number of repetitions per case of which the fastest is kept")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random generator")
+    args = parser.parse_args(argv)
+    REPEAT = args.repeat
+    BSNLibrary.bsn_generator.reseed(args.seed)
+    scale = 100 if args.quick else 1000
+    results = []
+    for bench in (bench_import, bench_given_and_length, bench_store_sizes, bench_large_store, bench_exclude_file,
+                  bench_fill_ratio, bench_lists):
+        results.extend(bench(scale))
+    report = {
+        'version': BSNLibrary.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': BSNLibrary._import_numpy() is not None,
+        'quick': args.quick,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as baseline:
+            return 1 if compare(results, json.load(baseline), args.tolerance) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())